@@ -27,9 +27,10 @@ class App(Tk):
     This class defines the behaviour of the app and its window.
     """
 
-    def __init__(self):
+    def __init__(self, engine='object'):
         """
         App constructor - initializes the windows and its contents.
+        :param engine: the automata's engine ('object' or 'kernel').
         :return: App object.
         """
 
@@ -54,7 +55,7 @@ class App(Tk):
             width=800,
             height=800)
         self.frame.place(relx=0.26, rely=0.025)
-        self.automata = Automata(self)
+        self.automata = Automata(self, engine)
 
         # Create configurations section with labels, entries and buttons.
         self.configuration = LabelFrame(
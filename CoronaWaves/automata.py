@@ -5,6 +5,7 @@ from style import palette
 
 
 DIM = 200
+TRAND_WINDOW = 10000  # Generations kept by an unlimited headless run.
 
 
 class Cell:
@@ -113,13 +114,15 @@ class Automata:
     This class implements the required cellular automata
     """
 
-    def __init__(self, app):
+    def __init__(self, app, engine='object'):
         """
         Automata's constructor. An automata object contains a state, a pointer
         to the containing App object, dimensions, parameters, a grid as a 2d
         list, a list of creatures in the automata and a list named "trand" that
         stores the number of infected creatures in each generation.
         :param app: a pointer to the containing App object.
+        :param engine: 'object' to step Creature objects on the grid of Cells,
+               or 'kernel' to step typed arrays with the (compiled) kernel.
         :return: Automata object.
         """
 
@@ -127,6 +130,7 @@ class Automata:
         self.state = State()
         self.generation = 0
         self.app = app
+        self.engine = engine
 
         # Experiment's parameters -- initializes later by set() function.
         self.n_creatures = 0
@@ -142,6 +146,17 @@ class Automata:
         self.grid = []  # Provides a way for cell occupancy check.
         self.creatures = []  # Traversing creatures is faster than cells.
         self.trand = []  # Store number of infected in each generation.
+        self.kernel = None  # Array representation for the 'kernel' engine.
+        self.publisher = None  # Optional MetricsPublisher.
+
+    def view(self):
+        """
+        This method iterates the creatures, e.g., for drawing.
+        :return: a generator of tuples (i, j, infection, steps).
+        """
+        if self.kernel:
+            return self.kernel.view()
+        return ((*c.pos, c.infection, c.steps) for c in self.creatures)
 
     def __advance(self):
         """
@@ -157,37 +172,49 @@ class Automata:
         self.app.frame.delete('all')
 
         # Create a new rectangle for each creature according to state and type.
-        for c in self.creatures:
+        for i, j, infection, steps in self.view():
 
             # Select color.
-            if c.infection > 0:
-                if c.steps == 10:
+            if infection > 0:
+                if steps == 10:
                     color = palette.red
                 else:
                     color = palette.orange
-            elif c.steps == 10:
+            elif steps == 10:
                 color = palette.cyan
             else:
                 color = palette.white
 
             # Find new position.
-            i, j = c.pos
             x0 = i * 4
             y0 = j * 4
             x1 = (i + 1) * 4
             y1 = (j + 1) * 4
             self.app.frame.create_rectangle(x0, y0, x1, y1, fill=color)
 
+        # Update the creatures.
+        self.step()
+
+    def step(self):
+        """
+        This method applies the automata's rules on all the creatures once. It
+        does not touch the app, so it can be used for headless runs.
+        :return: None, but it updates attributes.
+        """
+
         # Choose probability according to threshold.
         p = self.high_prob if self.n_infected < self.threshold else self.low_prob
 
         # Update each creature's infection and position.
-        count_infected = 0
-        for c in self.creatures:
-            c.infect(self.grid, p, self.healing_time)
-            if c.infection > 0:
-                count_infected += 1
-            c.move(self.grid)
+        if self.kernel:
+            count_infected = self.kernel.step(p, self.healing_time)
+        else:
+            count_infected = 0
+            for c in self.creatures:
+                c.infect(self.grid, p, self.healing_time)
+                if c.infection > 0:
+                    count_infected += 1
+                c.move(self.grid)
 
         # Update the number of infected creatures.
         self.n_infected = count_infected
@@ -211,6 +238,17 @@ class Automata:
             cap = 'inf'
         self.app.capacity.insert(0, cap)
 
+    def __record(self):
+        """
+        This private method saves the current number of infected and publishes
+        the metrics, if a publisher is attached.
+        :return: None.
+        """
+        self.trand.append(self.n_infected)
+        if self.publisher:
+            self.publisher.publish(self.generation, self.n_infected,
+                                   self.n_creatures, self.threshold)
+
     def __loop(self):
         """
         This private method implements the simulation itself. It updates
@@ -221,13 +259,28 @@ class Automata:
         """
         if self.state.is_running:
             self.__update_info()
-            self.trand.append(self.n_infected)
+            self.__record()
             self.__advance()
             if not self.gen_limit or self.generation <= self.gen_limit:
                 self.app.after(100, self.__loop)
             else:
                 self.app.stop_btn_action()
 
+    def run_headless(self):
+        """
+        This method runs the simulation without an app, e.g., on a server, as
+        fast as possible, until the generation limit (or forever if there is
+        no limitation, in which case "trand" keeps only the last TRAND_WINDOW
+        generations, so the memory does not grow).
+        :return: None.
+        """
+        while not self.gen_limit or self.generation <= self.gen_limit:
+            self.__record()
+            if not self.gen_limit and len(self.trand) >= 2 * TRAND_WINDOW:
+                del self.trand[:-TRAND_WINDOW]
+            self.generation += 1
+            self.step()
+
     def plot(self):
         """
         This private method creates a plot and show it.
@@ -291,6 +344,13 @@ class Automata:
         for c in chosen:
             c.steps = 10
 
+        # Move the creatures into arrays if the kernel engine is used. The
+        # kernel (and Numba) is imported only here, so the object engine
+        # starts without it.
+        if self.engine == 'kernel':
+            from kernel import KernelEngine
+            self.kernel = KernelEngine(self.creatures, DIM)
+
     def run(self):
         """
         This method make the simulation running.
@@ -317,5 +377,6 @@ class Automata:
         self.plot()
         self.grid = []
         self.creatures = []
+        self.kernel = None
         self.trand = []
         self.generation = 0
@@ -0,0 +1 @@
+# Makes the modules of this directory importable by the tests (see tests/).
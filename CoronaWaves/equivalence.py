@@ -0,0 +1,172 @@
+from argparse import ArgumentParser
+from math import log, sqrt
+from random import seed
+from sys import exit
+from time import perf_counter
+from automata import Automata
+
+
+# The reference engine and the alternative engines to verify against it. All
+# the engines preserve the order of the updates, so they must reproduce the
+# reference engine exactly. With '--statistical' they are also checked for the
+# same distribution of results over many seeds.
+REFERENCE = 'object'
+ENGINES = ['kernel']
+
+# A small scenario: N, D, X, R, P_high, P_low, T, L (see Automata.set()).
+SCENARIO = (2000, 0.05, 20, 0.5, 0.7, 0.3, 0.3, 0)
+
+
+def simulate(engine, seed_value, generations, scenario=SCENARIO):
+    """
+    Runs a headless simulation with the given engine.
+    :param engine: an engine name as accepted by Automata.
+    :param seed_value: a seed for the random module.
+    :param generations: number of generations to run.
+    :param scenario: the parameters passed to Automata.set().
+    :return: the "trand" list, the final creatures' states as a list of tuples
+             (i, j, infection, steps) and the stepping time in seconds.
+    """
+    seed(seed_value)
+    automata = Automata(None, engine)
+    automata.set(*scenario)
+    start = perf_counter()
+    for _ in range(generations):
+        automata.trand.append(automata.n_infected)
+        automata.step()
+    elapsed = perf_counter() - start
+    creatures = [tuple(int(v) for v in c) for c in automata.view()]
+    return automata.trand, creatures, elapsed
+
+
+def ks_statistic(sample1, sample2):
+    """
+    Calculates the two-sample Kolmogorov-Smirnov statistic, i.e., the maximal
+    distance between the empirical distribution functions of the samples.
+    :param sample1: a list of numbers.
+    :param sample2: a list of numbers.
+    :return: the statistic D.
+    """
+    a, b = sorted(sample1), sorted(sample2)
+    i = j = 0
+    d = 0.0
+    while i < len(a) and j < len(b):
+        x = min(a[i], b[j])
+        while i < len(a) and a[i] == x:
+            i += 1
+        while j < len(b) and b[j] == x:
+            j += 1
+        d = max(d, abs(i / len(a) - j / len(b)))
+    return d
+
+
+def ks_critical(n, m, alpha=0.01):
+    """
+    The critical value of the two-sample Kolmogorov-Smirnov test.
+    :param n: size of the first sample.
+    :param m: size of the second sample.
+    :param alpha: significance level.
+    :return: the value above which the samples are considered different.
+    """
+    return sqrt(-0.5 * log(alpha / 2)) * sqrt((n + m) / (n * m))
+
+
+def check_exact(engine, seeds, generations, scenario=SCENARIO):
+    """
+    Checks that the engine reproduces the reference trajectories exactly.
+    :param engine: the name of the engine to check.
+    :param seeds: a list of seeds, a scenario is run for each one.
+    :param generations: number of generations in each scenario.
+    :param scenario: the parameters passed to Automata.set().
+    :return: a tuple (passed, reference time, engine time).
+    """
+    passed = True
+    ref_time = engine_time = 0.0
+    for s in seeds:
+        ref_trand, ref_creatures, t1 = simulate(REFERENCE, s, generations,
+                                                scenario)
+        trand, creatures, t2 = simulate(engine, s, generations, scenario)
+        ref_time += t1
+        engine_time += t2
+        if trand != ref_trand or creatures != ref_creatures:
+            print(f'  seed {s}: trajectories differ.')
+            passed = False
+    return passed, ref_time, engine_time
+
+
+def check_statistical(engine, seeds, generations, alpha=0.01,
+                      scenario=SCENARIO):
+    """
+    Checks that the engine's "trand" is distributed like the reference's. For
+    the peak, the time of the peak and the final number of infected, the values
+    over all seeds are compared using the two-sample Kolmogorov-Smirnov test.
+    :param engine: the name of the engine to check.
+    :param seeds: a list of seeds, a scenario is run for each one.
+    :param generations: number of generations in each scenario.
+    :param alpha: significance level of the tests.
+    :param scenario: the parameters passed to Automata.set().
+    :return: a tuple (passed, reference time, engine time).
+    """
+    features = {'peak': ([], []), 'peak time': ([], []), 'final': ([], [])}
+    ref_time = engine_time = 0.0
+    for s in seeds:
+        for k, name in enumerate([REFERENCE, engine]):
+
+            # Use different seeds per engine, so the samples are independent.
+            trand, _, t = simulate(name, f'{s}-{name}', generations,
+                                   scenario)
+            peak = max(trand)
+            features['peak'][k].append(peak)
+            features['peak time'][k].append(trand.index(peak))
+            features['final'][k].append(trand[-1])
+            if k == 0:
+                ref_time += t
+            else:
+                engine_time += t
+    passed = True
+    critical = ks_critical(len(seeds), len(seeds), alpha)
+    for feature, (ref_values, values) in features.items():
+        d = ks_statistic(ref_values, values)
+        if d > critical:
+            print(f'  {feature}: D={d:.3f} > {critical:.3f}.')
+            passed = False
+    return passed, ref_time, engine_time
+
+
+def main():
+    parser = ArgumentParser(description='Verify CoronaWaves engines against '
+                                        'the reference object engine.')
+    parser.add_argument('--seeds', type=int, default=3,
+                        help='number of seeds for exact checks')
+    parser.add_argument('--statistical-seeds', type=int, default=40,
+                        help='number of seeds for statistical checks')
+    parser.add_argument('--generations', type=int, default=30)
+    parser.add_argument('--statistical', action='store_true',
+                        help='also check the engines statistically')
+    args = parser.parse_args()
+
+    # Warm up engines (e.g., JIT compilation) outside of the measurements.
+    for engine in ENGINES:
+        simulate(engine, 0, 1)
+
+    failures = 0
+    for engine in ENGINES:
+        checks = [('exact', check_exact, args.seeds)]
+        if args.statistical:
+            checks.append(('statistical', check_statistical,
+                           args.statistical_seeds))
+        for mode, check, n_seeds in checks:
+            passed, ref_time, engine_time = check(engine, list(range(n_seeds)),
+                                                  args.generations)
+            speedup = ref_time / engine_time if engine_time > 0 \
+                else float('inf')
+            print(f'{engine} ({mode}): {"PASSED" if passed else "FAILED"} | '
+                  f'reference {ref_time:.2f}s | engine {engine_time:.2f}s | '
+                  f'speedup x{speedup:.1f}')
+            if not passed:
+                failures += 1
+    exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
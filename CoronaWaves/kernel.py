@@ -0,0 +1,235 @@
+from array import array
+from random import random, randint, getstate, setstate
+
+try:
+    import numpy as np
+    from numba import njit
+    COMPILED = True
+except ImportError:
+    np = None
+    njit = None
+    COMPILED = False
+
+
+# Mersenne-Twister constants (as in CPython's _randommodule.c).
+MT_N = 624
+MT_M = 397
+MATRIX_A = 0x9908b0df
+UPPER_MASK = 0x80000000
+LOWER_MASK = 0x7fffffff
+WORD_MASK = 0xffffffff
+
+EMPTY = -1
+
+
+def _genrand(mt, mti):
+    """
+    Draws the next 32-bit word from a Mersenne-Twister state. This is a direct
+    port of CPython's genrand_uint32(), so feeding it the state returned by
+    random.getstate() reproduces the stream of the random module.
+    :param mt: the 624 words of the generator's state.
+    :param mti: a one-item array holding the position in the state.
+    :return: a 32-bit unsigned integer.
+    """
+    if mti[0] >= MT_N:
+        for kk in range(MT_N - MT_M):
+            y = (mt[kk] & UPPER_MASK) | (mt[kk + 1] & LOWER_MASK)
+            mt[kk] = mt[kk + MT_M] ^ (y >> 1) ^ (MATRIX_A * (y & 1))
+        for kk in range(MT_N - MT_M, MT_N - 1):
+            y = (mt[kk] & UPPER_MASK) | (mt[kk + 1] & LOWER_MASK)
+            mt[kk] = mt[kk + MT_M - MT_N] ^ (y >> 1) ^ (MATRIX_A * (y & 1))
+        y = (mt[MT_N - 1] & UPPER_MASK) | (mt[0] & LOWER_MASK)
+        mt[MT_N - 1] = mt[MT_M - 1] ^ (y >> 1) ^ (MATRIX_A * (y & 1))
+        mti[0] = 0
+    y = mt[mti[0]]
+    mti[0] += 1
+    y ^= y >> 11
+    y ^= (y << 7) & 0x9d2c5680
+    y ^= (y << 15) & 0xefc60000
+    y ^= y >> 18
+    return y & WORD_MASK
+
+
+def _random(mt, mti):
+    """
+    The same as random.random() -- a 53-bit float in [0, 1).
+    """
+    a = _genrand(mt, mti) >> 5
+    b = _genrand(mt, mti) >> 6
+    return (a * 67108864.0 + b) * (1.0 / 9007199254740992.0)
+
+
+def _step(grid, pos_i, pos_j, steps, infection, dim, probability,
+          healing_time, mt, mti):
+    """
+    Advances all the creatures by one generation. The creatures are visited in
+    order, and each one is first infected (or healed) and then moved, exactly
+    like Creature.infect() followed by Creature.move(). The random numbers are
+    drawn in the same order and with the same algorithms as the random module,
+    i.e., random() for infection and randint(-1, 1) for movement.
+    :param grid: a flat dim*dim array of creature indexes (-1 means empty).
+    :param pos_i: creatures' i-positions.
+    :param pos_j: creatures' j-positions.
+    :param steps: creatures' step sizes.
+    :param infection: creatures' infection counters.
+    :param dim: the dimension of the grid.
+    :param probability: probability of infection.
+    :param healing_time: number of generation for illness.
+    :param mt: Mersenne-Twister state words.
+    :param mti: a one-item array holding the position in the state.
+    :return: the number of infected creatures.
+    """
+    count_infected = 0
+    for k in range(len(pos_i)):
+        i = pos_i[k]
+        j = pos_j[k]
+
+        # Infection rule. Note that 'break' only leaves the inner loop.
+        if infection[k] < 1:
+            for x in range(-1, 2):
+                for y in range(-1, 2):
+                    if x == 0 and y == 0:
+                        continue
+                    n = grid[((i + x) % dim) * dim + (j + y) % dim]
+                    if n != EMPTY and infection[n] > 0:
+                        if _random(mt, mti) < probability:
+                            infection[k] = healing_time
+                            break
+        else:
+            infection[k] -= 1
+        if infection[k] > 0:
+            count_infected += 1
+
+        # Movement rule. randint(-1, 1) draws 2 bits and rejects 3.
+        s = steps[k]
+        for _ in range(5):
+            r = _genrand(mt, mti) >> 30
+            while r >= 3:
+                r = _genrand(mt, mti) >> 30
+            di = r - 1
+            r = _genrand(mt, mti) >> 30
+            while r >= 3:
+                r = _genrand(mt, mti) >> 30
+            dj = r - 1
+            new_i = (i + di * s) % dim
+            new_j = (j + dj * s) % dim
+            if new_i == i and new_j == j:
+                break
+            if grid[new_i * dim + new_j] == EMPTY:
+                grid[new_i * dim + new_j] = k
+                grid[i * dim + j] = EMPTY
+                pos_i[k] = new_i
+                pos_j[k] = new_j
+                break
+
+    return count_infected
+
+
+def _step_python(grid, pos_i, pos_j, steps, infection, dim, probability,
+                 healing_time):
+    """
+    A pure-Python fallback of _step() for when Numba is not installed. It draws
+    its random numbers directly from the random module.
+    """
+    count_infected = 0
+    for k in range(len(pos_i)):
+        i = pos_i[k]
+        j = pos_j[k]
+        if infection[k] < 1:
+            for x in range(-1, 2):
+                for y in range(-1, 2):
+                    if x == 0 and y == 0:
+                        continue
+                    n = grid[((i + x) % dim) * dim + (j + y) % dim]
+                    if n != EMPTY and infection[n] > 0:
+                        if random() < probability:
+                            infection[k] = healing_time
+                            break
+        else:
+            infection[k] -= 1
+        if infection[k] > 0:
+            count_infected += 1
+        s = steps[k]
+        for _ in range(5):
+            di, dj = randint(-1, 1), randint(-1, 1)
+            new_i = (i + di * s) % dim
+            new_j = (j + dj * s) % dim
+            if new_i == i and new_j == j:
+                break
+            if grid[new_i * dim + new_j] == EMPTY:
+                grid[new_i * dim + new_j] = k
+                grid[i * dim + j] = EMPTY
+                pos_i[k] = new_i
+                pos_j[k] = new_j
+                break
+    return count_infected
+
+
+if COMPILED:
+    _genrand = njit(cache=True)(_genrand)
+    _random = njit(cache=True)(_random)
+    _step = njit(cache=True)(_step)
+
+
+class KernelEngine:
+    """
+    This class is an alternative engine for the automata that keeps the
+    creatures in typed arrays instead of Cell and Creature objects. It keeps the
+    exact sequential move-and-infect semantics of the object engine (and the
+    same random stream), so both engines produce identical trajectories. If
+    Numba is installed the step is JIT-compiled, otherwise a pure-Python
+    fallback over the same arrays is used.
+    """
+
+    def __init__(self, creatures, dim):
+        """
+        KernelEngine's constructor. Copies the creatures' state into arrays.
+        :param creatures: a list of Creature objects, in traversal order.
+        :param dim: the dimension of the grid.
+        :return: KernelEngine object.
+        """
+        self.dim = dim
+        grid = [EMPTY] * (dim * dim)
+        for k, c in enumerate(creatures):
+            i, j = c.pos
+            grid[i * dim + j] = k
+        self.grid = self.__array(grid)
+        self.pos_i = self.__array([c.pos[0] for c in creatures])
+        self.pos_j = self.__array([c.pos[1] for c in creatures])
+        self.steps = self.__array([c.steps for c in creatures])
+        self.infection = self.__array([c.infection for c in creatures])
+
+    @staticmethod
+    def __array(values):
+        if COMPILED:
+            return np.array(values, dtype=np.int64)
+        return array('q', values)
+
+    def step(self, probability, healing_time):
+        """
+        Advances the creatures by one generation.
+        :param probability: probability of infection.
+        :param healing_time: number of generation for illness.
+        :return: the number of infected creatures.
+        """
+        if not COMPILED:
+            return _step_python(self.grid, self.pos_i, self.pos_j, self.steps,
+                                self.infection, self.dim, probability,
+                                healing_time)
+
+        # Continue the random module's stream inside the kernel.
+        version, internal, gauss = getstate()
+        mt = np.array(internal[:MT_N], dtype=np.int64)
+        mti = np.array(internal[MT_N:], dtype=np.int64)
+        count_infected = _step(self.grid, self.pos_i, self.pos_j, self.steps,
+                               self.infection, self.dim, probability,
+                               healing_time, mt, mti)
+        setstate((version, tuple(int(w) for w in mt) + (int(mti[0]),), gauss))
+        return int(count_infected)
+
+    def view(self):
+        """
+        Iterates the creatures' positions and attributes for drawing.
+        :return: a generator of tuples (i, j, infection, steps).
+        """
+        return zip(self.pos_i, self.pos_j, self.infection, self.steps)
@@ -1,6 +1,54 @@
-from app import App
+from argparse import ArgumentParser
+from automata import Automata
+from metrics import MetricsPublisher
 
 
 if __name__ == '__main__':
-    app = App()
-    app.mainloop()
+    parser = ArgumentParser(description='Corona Waves')
+    parser.add_argument('--engine', choices=['object', 'kernel'],
+                        default='object',
+                        help='simulation engine (kernel requires Numba to be '
+                             'fast, and falls back to pure Python otherwise)')
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help='publish live metrics on http://127.0.0.1:PORT')
+    parser.add_argument('--headless', action='store_true',
+                        help='run without the app, using the options below')
+    parser.add_argument('-N', type=int, default=4000,
+                        help='number of creatures')
+    parser.add_argument('-D', type=float, default=0.5,
+                        help='infection percentage')
+    parser.add_argument('-X', type=int, default=50, help='days for healing')
+    parser.add_argument('-R', type=float, default=0.5,
+                        help='fast movers percentage')
+    parser.add_argument('--high', type=float, default=0.7,
+                        help='high probability')
+    parser.add_argument('--low', type=float, default=0.3,
+                        help='low probability')
+    parser.add_argument('-T', type=float, default=0.5, help='threshold')
+    parser.add_argument('-L', type=int, default=0,
+                        help='generation limit (zero means no limitation)')
+    args = parser.parse_args()
+    if args.N <= 0 or args.N > 40000:
+        parser.error('number of creatures must be an int between 1 and 40000')
+
+    publisher = None
+    if args.metrics_port:
+        publisher = MetricsPublisher(port=args.metrics_port)
+        publisher.start()
+        print(f'Publishing metrics on http://127.0.0.1:{args.metrics_port}')
+
+    if args.headless:
+        automata = Automata(None, args.engine)
+        automata.publisher = publisher
+        automata.set(args.N, args.D, args.X, args.R, args.high, args.low,
+                     args.T, args.L)
+        automata.run_headless()
+        print(f'Finished after {automata.generation} generations.')
+    else:
+        from app import App  # Tkinter is required only for the app.
+        app = App(args.engine)
+        app.automata.publisher = publisher
+        app.mainloop()
+
+    if publisher:
+        publisher.stop()
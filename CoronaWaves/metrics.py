@@ -0,0 +1,179 @@
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from json import dumps
+from threading import Thread, Event
+
+
+PAGE = '''<!DOCTYPE html>
+<html>
+<head><title>Corona Waves</title></head>
+<body style="background:#2c313a;color:#f0f0f0;font-family:Consolas,monospace">
+<h3>Corona Waves - live metrics</h3>
+<pre id="info">Waiting for data...</pre>
+<script>
+const info = document.getElementById('info');
+const source = new EventSource('/stream');
+source.onmessage = (e) => {
+  const batch = JSON.parse(e.data);
+  const m = batch[batch.length - 1];
+  info.textContent = 'Generation:                   ' + m.generation + '\\n' +
+                     'Infected creatures:           ' + m.n_infected + '\\n' +
+                     'Distribution of infection:    ' + m.distribution + '\\n' +
+                     'Infection to threshold ratio: ' + m.capacity;
+};
+</script>
+</body>
+</html>
+'''
+
+
+def to_record(sample):
+    """
+    Converts a raw sample, as published by the simulation, to a record with the
+    same information shown in the app's information section.
+    :param sample: a tuple (sequence number, generation, n_infected,
+           n_creatures, threshold).
+    :return: a dictionary.
+    """
+    _, generation, n_infected, n_creatures, threshold = sample
+    if n_creatures > 0:
+        dist = str(int((n_infected / n_creatures) * 100)) + '%'
+    else:
+        dist = '0%'
+    if threshold > 0:
+        cap = str(int((n_infected / threshold) * 100)) + '%'
+    else:
+        cap = 'inf'
+    return {
+        'generation': generation,
+        'n_infected': n_infected,
+        'distribution': dist,
+        'capacity': cap
+    }
+
+
+class MetricsPublisher:
+    """
+    This class publishes the metrics of a running simulation over a local HTTP
+    server, so long runs can be watched from a browser or another process. The
+    simulation only appends raw samples to a bounded buffer, and all the
+    formatting and sending happens in the server's threads, which wake up
+    periodically and send the samples gathered since their last wake-up as one
+    batch. Therefore, publishing never slows the simulation loop.
+    The server provides the following endpoints:
+    * / - a live page.
+    * /metrics - the latest record as JSON.
+    * /history - all the buffered records as a JSON list.
+    * /stream - Server-Sent Events, each one is a JSON list of new records.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8000, history=10000,
+                 interval=0.5):
+        """
+        MetricsPublisher's constructor.
+        :param host: the address to listen on (local by default).
+        :param port: the port to listen on.
+        :param history: maximal number of buffered samples.
+        :param interval: seconds between two batches of the stream.
+        :return: MetricsPublisher object.
+        """
+        self.host = host
+        self.port = port
+        self.interval = interval
+        self.samples = deque(maxlen=history)
+        self.published = 0  # Total number of samples ever published.
+        self.stopped = Event()
+        self.server = None
+
+    def publish(self, generation, n_infected, n_creatures, threshold):
+        """
+        Publishes the metrics of one generation. This is called from the
+        simulation loop, so it does as little as possible.
+        :param generation: the current generation.
+        :param n_infected: the number of infected creatures.
+        :param n_creatures: the number of creatures.
+        :param threshold: the threshold to change between probabilities.
+        :return: None.
+        """
+        self.samples.append((self.published, generation, n_infected,
+                             n_creatures, threshold))
+        self.published += 1
+
+    def since(self, position):
+        """
+        Returns the buffered samples published since the given position.
+        :param position: a sequence number.
+        :return: a list of samples and the position to continue from.
+        """
+        samples = [s for s in list(self.samples) if s[0] >= position]
+        return samples, samples[-1][0] + 1 if samples else position
+
+    def start(self):
+        """
+        Starts the HTTP server in a background (daemon) thread.
+        :return: None.
+        """
+        publisher = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path == '/':
+                    self.__send('text/html', PAGE)
+                elif self.path == '/metrics':
+                    samples = list(publisher.samples)
+                    record = to_record(samples[-1]) if samples else {}
+                    self.__send('application/json', dumps(record))
+                elif self.path == '/history':
+                    records = [to_record(s) for s in list(publisher.samples)]
+                    self.__send('application/json', dumps(records))
+                elif self.path == '/stream':
+                    self.__stream()
+                else:
+                    self.send_error(404)
+
+            def __send(self, content_type, body):
+                data = body.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                self.wfile.write(data)
+
+            def __stream(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.send_header('Access-Control-Allow-Origin', '*')
+                self.end_headers()
+                position = 0
+                try:
+                    while not publisher.stopped.is_set():
+                        samples, position = publisher.since(position)
+                        if samples:
+                            batch = dumps([to_record(s) for s in samples])
+                            self.wfile.write(f'data: {batch}\n\n'.encode())
+                            self.wfile.flush()
+                        publisher.stopped.wait(publisher.interval)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # The client has gone.
+
+            def log_message(self, *args):
+                pass  # Keep the console clean.
+
+        self.stopped.clear()
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        """
+        Stops the HTTP server.
+        :return: None.
+        """
+        self.stopped.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
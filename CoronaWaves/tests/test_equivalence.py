@@ -0,0 +1,29 @@
+from matplotlib import use
+use('Agg')  # Automata imports pyplot, so the tests need no display.
+
+from equivalence import ENGINES, check_exact, check_statistical, \
+    ks_statistic, ks_critical
+
+
+# N, D, X, R, P_high, P_low, T, L (see Automata.set()).
+SCENARIO = (300, 0.1, 10, 0.5, 0.7, 0.3, 0.3, 0)
+
+
+def test_engines_are_exact():
+    for engine in ENGINES:
+        passed, _, _ = check_exact(engine, [0, 1], 10, scenario=SCENARIO)
+        assert passed, engine
+
+
+def test_engines_are_statistically_equivalent():
+    for engine in ENGINES:
+        passed, _, _ = check_statistical(engine, list(range(10)), 10,
+                                         scenario=SCENARIO)
+        assert passed, engine
+
+
+def test_ks_statistic():
+    assert ks_statistic([1, 2, 3], [1, 2, 3]) == 0
+    assert ks_statistic([1, 2, 3], [4, 5, 6]) == 1
+    assert ks_statistic([1, 2, 3, 4], [3, 4, 5, 6]) == 0.5
+    assert ks_critical(10, 10) < ks_statistic(range(10), range(10, 20))
@@ -2,9 +2,14 @@
 # Content: the entry point of the program.
 
 
+from sys import argv
 from src.cli import FutoshikiCli
+from src.service import main
 
 
 if __name__ == '__main__':
-    cli = FutoshikiCli()
-    cli.mainloop()
+    if len(argv) > 1:
+        main(argv[1:])  # Batch mode, e.g., 'python app.py inputs -o out.jsonl'.
+    else:
+        cli = FutoshikiCli()
+        cli.mainloop()
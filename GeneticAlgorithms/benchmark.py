@@ -0,0 +1,199 @@
+# File: benchmark.py
+# Content: a benchmark of the genetic solver - runs every puzzle with every
+# configuration over several seeds, prints a comparison table and writes the
+# results to a JSON file (which can be compared with a previous one).
+
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from json import dump, load
+from statistics import mean, median
+from time import perf_counter
+from prettytable import PrettyTable
+from src.game import parse_game
+from src.solver import genetic_solver
+from src.batch import batch_genetic_solver
+from src.service import find_puzzles
+
+
+# Optimization methods (as written in the results).
+OPTIMS = ['none', 'lamark', 'darwin']
+
+
+def configurations(optims, populations):
+    """
+    This function lists the configurations of a benchmark.
+    :param optims: a list of optimization methods (see OPTIMS).
+    :param populations: a list of population sizes.
+    :return: a list of dictionaries with 'optim' and 'pop_size'.
+    """
+    return [{'optim': o, 'pop_size': p} for o in optims for p in populations]
+
+
+def run(path, config, seed_value, params):
+    """
+    Solves a puzzle once.
+    :param path: a path to a game input file.
+    :param config: a configuration (see configurations()).
+    :param seed_value: the seed of the run's random streams (see seeding.py).
+    :param params: a dictionary of the benchmark's parameters (generations,
+           elitism, crossover, budget and vectorized).
+    :return: a result record (a dictionary).
+    """
+    with open(path, 'r') as file:
+        game = parse_game(file.readlines())
+    solver = batch_genetic_solver if params['vectorized'] else genetic_solver
+    optim = None if config['optim'] == 'none' else config['optim']
+    start = perf_counter()
+    stats = solver(game, params['generations'], config['pop_size'],
+                   params['elitism'], params['crossover'], optim=optim,
+                   time_budget=params['budget'], verbose=False,
+                   seed=seed_value)
+    seconds = perf_counter() - start
+    solved = game.validate(stats.solution)
+    return {
+        'puzzle': path,
+        'optim': config['optim'],
+        'pop_size': config['pop_size'],
+        'seed': seed_value,
+        'solved': solved,
+        'seconds': round(seconds, 4),
+        'time_to_solution': round(seconds, 4) if solved else None,
+        'generations': stats.generations,
+        'fitness_calls': stats.fitness_calls,
+        'fitness': stats.fitness,
+        'n_constraints': game.n_constraints,
+    }
+
+
+def key(record):
+    """
+    This function returns the puzzle and configuration of a record (or of a
+    summary row), by which records are grouped and compared.
+    """
+    return record['puzzle'], record['optim'], record['pop_size']
+
+
+def summarize(runs):
+    """
+    This function aggregates the runs of each puzzle and configuration.
+    :param runs: a list of result records (see run()).
+    :return: a list of summary rows (dictionaries), in the order of the runs.
+    """
+    groups = {}
+    for r in runs:
+        groups.setdefault(key(r), []).append(r)
+    summary = []
+    for (puzzle, optim, pop_size), group in groups.items():
+        times = [r['time_to_solution'] for r in group if r['solved']]
+        summary.append({
+            'puzzle': puzzle,
+            'optim': optim,
+            'pop_size': pop_size,
+            'runs': len(group),
+            'success_rate': round(len(times) / len(group), 4),
+            'median_time_to_solution': round(median(times), 4) if times
+            else None,
+            'mean_generations': round(mean(r['generations'] for r in group),
+                                      1),
+            'mean_fitness_calls': round(mean(r['fitness_calls']
+                                             for r in group), 1),
+            'mean_fitness': round(mean(r['fitness'] for r in group), 2),
+        })
+    return summary
+
+
+def print_table(summary, baseline=None):
+    """
+    This function prints the comparison table of a benchmark. If a baseline
+    summary is given, the changes of the success rate and of the median
+    time-to-solution are shown too (a regression is a lower success rate or a
+    longer time).
+    :param summary: a list of summary rows (see summarize()).
+    :param baseline: an optional list of summary rows of a previous benchmark.
+    :return: None.
+    """
+    columns = ['Puzzle', 'Optim', 'Population', 'Success', 'Time (s)',
+               'Generations', 'Fitness Calls', 'Fitness']
+    previous = {key(row): row for row in baseline or []}
+    if baseline is not None:
+        columns += ['Success Change', 'Time Change']
+    table = PrettyTable(columns)
+    table.align = 'l'
+    for row in summary:
+        time = row['median_time_to_solution']
+        line = [row['puzzle'], row['optim'], row['pop_size'],
+                f'{row["success_rate"]:.0%}',
+                '-' if time is None else f'{time:.3f}',
+                row['mean_generations'], row['mean_fitness_calls'],
+                row['mean_fitness']]
+        if baseline is not None:
+            old = previous.get(key(row))
+            if old is None:
+                line += ['new', 'new']
+            else:
+                line.append(f'{row["success_rate"] - old["success_rate"]:+.0%}')
+                old_time = old['median_time_to_solution']
+                if time is None or old_time is None:
+                    line.append('-')
+                else:
+                    line.append(f'{(time - old_time) / old_time:+.0%}')
+        table.add_row(line)
+    print(table)
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark the genetic solver on a set '
+                                        'of puzzles.')
+    parser.add_argument('sources', nargs='*', default=['inputs'],
+                        help='directories, glob patterns or files of games '
+                             '(the bundled inputs by default)')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                        help='the results file')
+    parser.add_argument('--compare', default=None,
+                        help='a results file of a previous benchmark')
+    parser.add_argument('--optims', nargs='+', choices=OPTIMS, default=OPTIMS)
+    parser.add_argument('--populations', type=int, nargs='+',
+                        default=[50, 100, 200])
+    parser.add_argument('--seeds', type=int, default=5,
+                        help='number of runs (seeds 0, 1, ...) per puzzle and '
+                             'configuration')
+    parser.add_argument('-g', '--generations', type=int, default=1000)
+    parser.add_argument('-e', '--elitism', type=float, default=0.01)
+    parser.add_argument('-c', '--crossover', type=float, default=0.8)
+    parser.add_argument('--budget', type=float, default=None,
+                        help='time budget per run in seconds')
+    parser.add_argument('--vectorized', action='store_true')
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='number of processes (runs in parallel are timed '
+                             'less accurately)')
+    args = parser.parse_args()
+
+    params = {'generations': args.generations, 'elitism': args.elitism,
+              'crossover': args.crossover, 'budget': args.budget,
+              'vectorized': args.vectorized}
+    tasks = [(path, config, s, params)
+             for path in sorted(find_puzzles(args.sources))
+             for config in configurations(args.optims, args.populations)
+             for s in range(args.seeds)]
+    print(f'Running {len(tasks)} runs...')
+    if args.workers > 1:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            runs = list(pool.map(run, *zip(*tasks)))
+    else:
+        runs = [run(*task) for task in tasks]
+
+    summary = summarize(runs)
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = load(file)['summary']
+    print_table(summary, baseline)
+    with open(args.output, 'w') as file:
+        dump({'params': params, 'runs': runs, 'summary': summary}, file,
+             indent=1)
+    print(f'Results were written to {args.output}.')
+
+
+if __name__ == '__main__':
+    main()
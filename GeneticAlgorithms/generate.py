@@ -0,0 +1,38 @@
+# File: generate.py
+# Content: generates corpora of Futoshiki games with unique solutions (see
+# src/generator.py), e.g., for scaling benchmarks.
+
+
+from argparse import ArgumentParser
+from time import perf_counter
+from src.generator import generate_corpus
+
+
+def main():
+    parser = ArgumentParser(description='Generate Futoshiki games with unique '
+                                        'solutions, and their solution files.')
+    parser.add_argument('directory', help='the output directory')
+    parser.add_argument('-n', '--count', type=int, default=10,
+                        help='number of games per dimension')
+    parser.add_argument('-d', '--dims', type=int, nargs='+', default=[8],
+                        help='dimensions of the boards')
+    parser.add_argument('--givens', type=float, default=0.1,
+                        help='fraction of the cells whose digits are given '
+                             '(more are added if needed for uniqueness)')
+    parser.add_argument('--relations', type=float, default=0.3,
+                        help='fraction of the adjacent cells that have a '
+                             'relation (more are added if needed for '
+                             'uniqueness)')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for dim in args.dims:
+        start = perf_counter()
+        paths = generate_corpus(args.directory, args.count, dim, args.givens,
+                                args.relations, args.seed)
+        print(f'Generated {len(paths)} {dim}x{dim} games in '
+              f'{perf_counter() - start:.2f}s.')
+
+
+if __name__ == '__main__':
+    main()
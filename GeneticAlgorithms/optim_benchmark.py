@@ -0,0 +1,265 @@
+# File: optim_benchmark.py
+# Content: a micro-benchmark of the optimization's auxiliary functions - the
+# baseline list-based implementations (copied verbatim from the first version
+# of src/optim.py, defects included) against the set and bitmask based ones in
+# src/optim.py, on random boards of several sizes. The results of both are
+# compared before any timing is reported.
+
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from prettytable import PrettyTable
+from src.game import Futoshiki
+from src.stats import Statistics
+from src.utils import Solution
+from src.optim import find_unsatisfied_cells, find_optimizations
+
+
+def baseline_create_truth_matrix(game, solution):
+    """
+    This function creates a "truth" matrix which holds in the i,j-cell the
+    number of unsatisfied constraints by the given solution in the given game.
+    :param game: a Futoshiki game object.
+    :param solution: a Solution object.
+    :return: the described matrix.
+    """
+
+    # First, set the solution.
+    game.set(solution.vector)
+    truth_matrix = []
+
+    # Check constraints' satisfaction - for each constraint.
+    for x in range(game.dim):
+        row = []
+        for y in range(game.dim):
+            v = game.matrix[x][y]
+            not_satisfied = 0
+
+            # Check row-constraint.
+            for i in range(game.dim):
+                if i != x and game.matrix[i][y] == v:
+                    not_satisfied += 1
+                    break
+
+            # Check column-constraint.
+            for j in range(game.dim):
+                if j != y and game.matrix[x][j] == v:
+                    not_satisfied += 1
+                    break
+
+            # Check relation-constraint.
+            for a, b, c, d in game.relations:
+                if (x, y) == (a, b) and game.matrix[x][y] <= game.matrix[c][d]:
+                    not_satisfied += 1
+                    break
+
+            row.append(not_satisfied)
+        truth_matrix.append(row)
+    return truth_matrix
+
+
+def baseline_find_unsatisfied_cells(game, solution):
+    """
+    This function finds all the cells in the game matrix that are not satisfied
+    by the given solution, using a "truth" matrix.
+    :param game: a Futoshiki game object.
+    :param solution: a Solution object.
+    :return: a list of tuples (i, j, u) where i,j are the cell position and u is
+             the number of unsatisfied constraints by the value in this cell.
+    """
+    truth_matrix = baseline_create_truth_matrix(game, solution)
+    unsatisfied_cells = []
+
+    # Fill a list with unsatisfied cells by the truth_matrix.
+    for x in range(game.dim):
+        for y in range(game.dim):
+            if truth_matrix[x][y] > 0:
+                unsatisfied_cells.append((x, y, truth_matrix[x][y]))
+
+    # Filter out game's given numbers.
+    for i, j, u in unsatisfied_cells:
+        if (i, j) in game.given.keys():
+            unsatisfied_cells.remove((i, j, u))
+
+    return unsatisfied_cells
+
+
+def baseline_find_optimizations(game, cells):
+    """
+    This function finds a list of optimization options sorted by urgency.
+    :param game: a Futoshiki game object.
+    :param cells: a list of tuples (i,j,u) where the i,j-cell hit u constraints.
+    :return: a list of tuples (x, y, [O], t) where the x,y-cell can be optimized
+             by setting a value in it from the list [O] and currently this cell
+             is not satisfying u constraints.
+    """
+    optimizations = []
+    count = 0
+
+    # For 'limit' unsatisfied cells in urgency order...
+    for x, y, u in cells:
+        v = game.matrix[x][y]
+
+        # Initialize a list of allowed values.
+        allowed = [i + 1 for i in range(game.dim)]
+
+        # Remove from 'allowed' the values in the cell's row.
+        for i in range(game.dim):
+            if i != x and game.matrix[i][y] in allowed:
+                allowed.remove(game.matrix[i][y])
+
+        # Remove from 'allowed' the values in the cell's column.
+        for j in range(game.dim):
+            if j != y and game.matrix[x][j] in allowed:
+                allowed.remove(game.matrix[x][j])
+
+        # Remove from 'allowed' values according to relation constraints.
+        for a, b, c, d in game.relations:
+            u = game.matrix[c][d]
+            if (x, y) == (a, b) and v <= u:
+                for av in allowed:
+                    if av <= u:
+                        allowed.remove(av)
+
+        # If there are any allowed values left, add a tuple to the return list.
+        if len(allowed) > 0:
+            optimizations.append((x, y, allowed, u))
+            count += 1
+
+    return optimizations
+
+
+def normalize_cells(game, cells):
+    """
+    Fixes a known defect of baseline_find_unsatisfied_cells() - it removes the
+    given cells from the list while iterating it, so a given cell that follows
+    another one is kept.
+    :param game: a Futoshiki game object.
+    :param cells: a list of tuples (i, j, u).
+    :return: the list without the given cells.
+    """
+    return [(i, j, u) for i, j, u in cells if (i, j) not in game.given]
+
+
+def normalize_optimizations(game, cells, optimizations):
+    """
+    Fixes the known defects of baseline_find_optimizations() - it overwrites
+    the urgency u with the digit of a relation's cell, and it removes values
+    from the allowed list while iterating it, so a value that follows a removed
+    one is kept. The game's board should hold the solution of the cells.
+    :param game: a Futoshiki game object.
+    :param cells: the list of tuples (i, j, u) the optimizations were found
+           for.
+    :param optimizations: a list of tuples (x, y, [O], u).
+    :return: the list of optimizations with the right urgencies and without
+             the values that break relations.
+    """
+    urgency = {(x, y): u for x, y, u in cells}
+    normalized = []
+    for x, y, allowed, _ in optimizations:
+        v = game.matrix[x][y]
+        for a, b, c, d in game.relations:
+            w = game.matrix[c][d]
+            if (x, y) == (a, b) and v <= w:
+                allowed = [av for av in allowed if av > w]
+        if allowed:
+            normalized.append((x, y, allowed, urgency[(x, y)]))
+    return normalized
+
+
+def random_game(dim, rng, givens=0.2, relations=0.3):
+    """
+    Creates a random game whose solution is a shuffled Latin square.
+    :param dim: the dimension of the board.
+    :param rng: a random.Random object.
+    :param givens: the fraction of cells whose digits are given.
+    :param relations: the probability of a relation between adjacent cells.
+    :return: a Futoshiki game object.
+    """
+    rows, cols, digits = list(range(dim)), list(range(dim)), list(range(dim))
+    rng.shuffle(rows)
+    rng.shuffle(cols)
+    rng.shuffle(digits)
+    square = [[digits[(r + c) % dim] + 1 for c in cols] for r in rows]
+    given = [(i + 1, j + 1, square[i][j]) for i in range(dim)
+             for j in range(dim) if rng.random() < givens]
+    related = []
+    for i in range(dim):
+        for j in range(dim):
+            for x, y in (i, j + 1), (i + 1, j):
+                if x < dim and y < dim and rng.random() < relations:
+                    if square[i][j] > square[x][y]:
+                        related.append((i + 1, j + 1, x + 1, y + 1))
+                    else:
+                        related.append((x + 1, y + 1, i + 1, j + 1))
+    return Futoshiki(dim, given, related)
+
+
+def per_call(function, game, arguments):
+    """
+    Measures the average time of a function call.
+    :return: the average time in microseconds and the list of results.
+    """
+    start = perf_counter()
+    results = [function(game, a) for a in arguments]
+    return (perf_counter() - start) * 1e6 / len(arguments), results
+
+
+def main():
+    parser = ArgumentParser(description='Micro-benchmark of the optimization\'s'
+                                        ' auxiliary functions.')
+    parser.add_argument('-n', '--calls', type=int, default=2000,
+                        help='number of calls per function and board size')
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[5, 6, 7, 8, 9])
+    args = parser.parse_args()
+
+    rng = Random(args.seed)
+    table = PrettyTable(['Board', 'Function', 'Before (us)', 'After (us)',
+                         'Speedup'])
+    table.align = 'l'
+    rows = []
+    for dim in args.sizes:
+        game = random_game(dim, rng)
+        game.stats = Statistics()
+        solutions = [Solution(game, [rng.randint(1, dim)
+                                     for _ in range(game.solution_size)])
+                     for _ in range(args.calls)]
+
+        # Unsatisfied cells - the results must be the same (up to the
+        # baseline's defects) before any timing is reported.
+        before, expected = per_call(baseline_find_unsatisfied_cells, game,
+                                    solutions)
+        after, results = per_call(find_unsatisfied_cells, game, solutions)
+        for cells, baseline in zip(results, expected):
+            if cells != normalize_cells(game, baseline):
+                raise AssertionError(f'{dim}x{dim}: unsatisfied cells differ.')
+        rows.append([f'{dim}x{dim}', 'find_unsatisfied_cells', before, after])
+
+        # Optimizations (the board must hold the solution of the cells).
+        before = after = 0
+        for solution, cells in zip(solutions, results):
+            game.set(solution.vector)
+            start = perf_counter()
+            baseline = baseline_find_optimizations(game, cells)
+            middle = perf_counter()
+            optimizations = find_optimizations(game, cells)
+            after += perf_counter() - middle
+            before += middle - start
+            if optimizations != normalize_optimizations(game, cells,
+                                                        baseline):
+                raise AssertionError(f'{dim}x{dim}: optimizations differ.')
+        rows.append([f'{dim}x{dim}', 'find_optimizations',
+                     before * 1e6 / args.calls, after * 1e6 / args.calls])
+
+    # All the results agree, so report the timings.
+    for board, function, before, after in rows:
+        table.add_row([board, function, f'{before:.1f}', f'{after:.1f}',
+                       f'{before / after:.1f}x'])
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,438 @@
+# File: batch.py
+# Content: a vectorized (NumPy) Genetic Algorithm that evaluates and evolves
+# the whole population at once.
+
+
+import numpy as np
+from datetime import datetime
+from src.utils import print_generation
+from src.stats import Statistics, HISTORY_SIZE
+from src.cancel import CancellationToken
+from src.selection import select, ROULETTE
+from src.restart import RestartPolicy, diversity
+from src.seeding import seed_game
+from src.permutation import CELLS
+from src.optim import optimize_batch
+
+
+class BatchEvaluator:
+    """
+    An instance of this class evaluates the fitness of a whole population,
+    given as a 2D integer array (pop_size x solution_size), in a handful of
+    vectorized operations. It computes the same score as utils.fitness() without
+    touching the game's matrix.
+    """
+
+    def __init__(self, game):
+        """
+        Constructor. Precomputes the board of given digits, the positions of
+        the solution's cells and the relations in a flattened board, and the
+        domains of the cells (if the game has any, see propagation.py).
+        :param game: a Futoshiki game object.
+        """
+        self.game = game
+        self.dim = game.dim
+        self.base = np.zeros(game.dim * game.dim, dtype=np.int8)
+        for (i, j), v in game.given.items():
+            self.base[i * game.dim + j] = v
+        self.free = np.array([i * game.dim + j for i, j in game.cells],
+                             dtype=np.intp)
+        self.greater = np.array([a * game.dim + b
+                                 for a, b, _, _ in game.relations],
+                                dtype=np.intp)
+        self.smaller = np.array([c * game.dim + d
+                                 for _, _, c, d in game.relations],
+                                dtype=np.intp)
+        self.values = np.arange(1, game.dim + 1, dtype=np.int8)
+        self.domains = None  # The [k, v-1] entry tells if v is in k's domain.
+        if game.domains:
+            self.domains = np.zeros((game.solution_size, game.dim), dtype=bool)
+            for k, domain in enumerate(game.domains):
+                self.domains[k, np.array(domain) - 1] = True
+        self.buffer = np.empty((0, game.dim * game.dim), dtype=np.int8)
+
+    def boards(self, population):
+        """
+        Scatters the population into a (pop_size x dim x dim) board tensor
+        together with the given digits. The tensor is written into a buffer
+        that is reused by the following calls.
+        :param population: a (pop_size x solution_size) integer array.
+        :return: the board tensor.
+        """
+        if len(self.buffer) < len(population):
+            self.buffer = np.empty((len(population), self.dim * self.dim),
+                                   dtype=np.int8)
+        boards = self.buffer[:len(population)]
+        boards[:] = self.base
+        boards[:, self.free] = population
+        return boards.reshape(len(population), self.dim, self.dim)
+
+    def counts(self, boards):
+        """
+        Counts how many times each value is used in each row and column.
+        :param boards: a (pop_size x dim x dim) board tensor.
+        :return: two (pop_size x dim x dim) tensors, where the [p, i, v-1]
+                 entries count the value v in the i-th row and in the i-th
+                 column of the p-th board.
+        """
+        one_hot = boards[..., np.newaxis] == self.values  # P x n x n x n.
+        return one_hot.sum(axis=2), one_hot.sum(axis=1)
+
+    def violations(self, boards):
+        """
+        Finds the cells whose value appears in another cell of their row or
+        column.
+        :param boards: a (pop_size x dim x dim) board tensor.
+        :return: two boolean (pop_size x dim x dim) tensors, marking the cells
+                 that hit column-constraints and row-constraints.
+        """
+        row_counts, col_counts = self.counts(boards)
+        index = boards.astype(np.intp) - 1
+        in_row = np.take_along_axis(row_counts, index, axis=2)
+        in_col = np.take_along_axis(col_counts, index.transpose(0, 2, 1),
+                                    axis=2).transpose(0, 2, 1)
+        return in_col > 1, in_row > 1
+
+    def __call__(self, population, out=None):
+        """
+        Evaluates the fitness of all the individuals in the population.
+        :param population: a (pop_size x solution_size) integer array.
+        :param out: an optional integer array to write the scores into.
+        :return: an integer array of fitness scores.
+        """
+        self.game.stats.fitness_calls += len(population)
+        boards = self.boards(population)
+        col_hits, row_hits = self.violations(boards)
+        flat = boards.reshape(len(population), -1)
+        rel_hits = flat[:, self.greater] <= flat[:, self.smaller]
+        if out is None:
+            out = np.empty(len(population), dtype=np.int64)
+        out[:] = self.game.n_constraints
+        out -= col_hits.sum(axis=(1, 2))
+        out -= row_hits.sum(axis=(1, 2))
+        out -= rel_hits.sum(axis=1)
+        return out
+
+
+def random_digits(game, indexes):
+    """
+    Draws a random digit for each of the given vector indexes, from the index's
+    domain if the game has domains (see propagation.py).
+    :param game: a Futoshiki game object.
+    :param indexes: an integer array of vector indexes.
+    :return: an integer array of digits, of the same shape.
+    """
+    if not game.domains:
+        return game.np_rng.integers(1, game.dim + 1, np.shape(indexes),
+                                    dtype=np.int8)
+    table = np.zeros((game.solution_size, game.dim), dtype=np.int8)
+    sizes = np.zeros(game.solution_size, dtype=np.intp)
+    for k, domain in enumerate(game.domains):
+        table[k, :len(domain)] = domain
+        sizes[k] = len(domain)
+    picks = game.np_rng.random(np.shape(indexes)) * sizes[indexes]
+    return table[indexes, picks.astype(np.intp)]
+
+
+class Population:
+    """
+    An array-backed population. The individuals are the rows of a preallocated
+    (size x solution_size) array of small integers, and their scores are kept
+    in a fitness column. A second pair of arrays of the same shape holds the
+    next generation while it is built (double buffering), so evolving the
+    population allocates no object per individual.
+    """
+
+    def __init__(self, game, size):
+        """
+        Constructor.
+        :param game: a Futoshiki game object.
+        :param size: number of individuals.
+        """
+        self.game = game
+        self.genes = np.empty((size, game.solution_size), dtype=np.int8)
+        self.fitness = np.empty(size, dtype=np.int64)
+        self.next_genes = np.empty_like(self.genes)
+        self.next_fitness = np.empty_like(self.fitness)
+
+    def __len__(self):
+        return len(self.fitness)
+
+    def randomize(self, evaluate, start=0):
+        """
+        Fills the population with random individuals (with digits from the
+        game's domains, if it has any) and evaluates them.
+        :param evaluate: a BatchEvaluator object.
+        :param start: the individuals before this index are kept (e.g., the
+               best ones in a sorted population).
+        :return: None.
+        """
+        genes = self.genes[start:]
+        indexes = np.broadcast_to(np.arange(genes.shape[1]), genes.shape)
+        genes[:] = random_digits(self.game, indexes)
+        evaluate(genes, out=self.fitness[start:])
+
+    def swap(self):
+        """
+        Makes the next generation the current one (and the current one the
+        buffer for the next).
+        :return: None.
+        """
+        self.genes, self.next_genes = self.next_genes, self.genes
+        self.fitness, self.next_fitness = self.next_fitness, self.fitness
+
+    def sort(self):
+        """
+        Sorts the individuals by their fitness in descending order.
+        :return: None.
+        """
+        order = np.argsort(-self.fitness, kind='stable')
+        np.take(self.genes, order, axis=0, out=self.next_genes)
+        np.take(self.fitness, order, out=self.next_fitness)
+        self.swap()
+
+
+def cross_over(genes, parents1, parents2, out, rng):
+    """
+    Vectorized version of utils.cross_over() - each newborn takes the prefix of
+    one parent and the suffix of the other, separated at a random index.
+    :param genes: a 2D array of individuals.
+    :param parents1: an array of indexes of the first parents.
+    :param parents2: an array of indexes of the second parents.
+    :param out: a 2D array to write the newborns into.
+    :param rng: a numpy.random.Generator object.
+    :return: None.
+    """
+    n, size = out.shape
+    np.take(genes, parents1, axis=0, out=out)
+    sep = rng.integers(0, size, n)
+    rows, cols = np.nonzero(np.arange(size) >= sep[:, np.newaxis])
+    out[rows, cols] = genes[parents2[rows], cols]
+
+
+def mutate(game, genes):
+    """
+    Vectorized version of utils.mutate() that mutates the individuals in place.
+    Each individual is mutated by one of three tactics drawn uniformly: swapping
+    two random indexes, swapping two adjacent indexes, or setting a random value
+    in a random index.
+    :param game: a Futoshiki game object.
+    :param genes: a 2D array of individuals.
+    :return: the information needed to undo the mutations (see undo()).
+    """
+    game.stats.mutate_calls += len(genes)
+    n, size = genes.shape
+    rows = np.arange(n)
+    # A single index cannot be swapped, so it is always changed (tactic 3).
+    coin = game.np_rng.integers(1, 4, n) if size > 1 else np.full(n, 3)
+
+    # Tactics 1 and 2 -- swapping two random or two adjacent indexes.
+    i = game.np_rng.integers(0, size, n)
+    j = i.copy()
+    if size > 1:
+        j = (i + game.np_rng.integers(1, size, n)) % size  # Any other index.
+        adjacent = coin == 2
+        i[adjacent] = game.np_rng.integers(1, size, adjacent.sum())
+        j[adjacent] = i[adjacent] - 1
+    change = coin == 3
+    j[change] = i[change]
+    old_i, old_j = genes[rows, i], genes[rows, j]
+    genes[rows, i] = old_j
+    genes[rows, j] = old_i
+
+    # Tactic 3 -- changing one number in the vector.
+    genes[rows[change], i[change]] = random_digits(game, i[change])
+    return rows, i, j, old_i, old_j
+
+
+def undo(genes, mutations, mask):
+    """
+    Undoes the mutations of some of the individuals.
+    :param genes: the 2D array of individuals that were mutated.
+    :param mutations: the information returned by mutate().
+    :param mask: a boolean array that marks the individuals to restore.
+    :return: None.
+    """
+    rows, i, j, old_i, old_j = (a[mask] for a in mutations)
+    genes[rows, j] = old_j
+    genes[rows, i] = old_i
+
+
+def batch_genetic_solver(game, generations, pop_size, elitism, crossover,
+                         optim=None, token=None, time_budget=None,
+                         max_evaluations=None, progress=None,
+                         selection=ROULETTE, encoding=CELLS, verbose=True,
+                         on_generation=None, restart=None, seed=None,
+                         history_size=HISTORY_SIZE, downsample=False):
+    """
+    This function is a vectorized version of solver.genetic_solver(). The
+    population is kept in a Population object end-to-end, and every step of the
+    evolution (evaluation, selection, cross-over and mutation) is applied to all
+    the individuals at once, writing into the population's preallocated arrays.
+    :param game: a Futoshiki game object.
+    :param generations: number of generations parameter.
+    :param pop_size: population size parameter.
+    :param elitism: elitism parameter.
+    :param crossover: cross-over parameter (defines also the replication rate).
+    :param optim: a string that tells what optimization to use (see
+           optim.optimize_batch()).
+    :param token: an optional CancellationToken that is checked every
+           generation (see solver.genetic_solver()).
+    :param time_budget: seconds the run may take. Once they pass, the best
+           solution found so far is returned (checked every generation).
+    :param max_evaluations: fitness calls the run may perform. Once they are
+           used, the best solution found so far is returned (checked every
+           generation, so the last generation may exceed it a bit).
+    :param progress: an optional function f(g, stats) that is called whenever
+           a better solution is found, with the generation number and the
+           Statistics object, which holds the best solution so far.
+    :param selection: the selection method of parents and survivors (see
+           selection.py).
+    :param encoding: the encoding of solutions (only CELLS is supported yet by
+           this solver).
+    :param verbose: a boolean that tells if to print progress.
+    :param on_generation: an optional function f(g, population) that is called
+           every generation with the sorted population array. Returning True
+           stops the run.
+    :param restart: a RestartPolicy object (see solver.genetic_solver()).
+    :param seed: the seed of the run's random streams (see
+           solver.genetic_solver()).
+    :param history_size: see solver.genetic_solver().
+    :param downsample: see solver.genetic_solver().
+    :return: a Statistics object that contains the solution.
+    """
+    if encoding != CELLS:
+        raise ValueError('The vectorized solver supports only the cells '
+                         'encoding.')
+
+    # Timer & Statistics.
+    start = datetime.now()
+    game.stats = Statistics(history_size, downsample)
+    seed_game(game, seed)
+    token = CancellationToken.run(token, time_budget, max_evaluations)
+    evaluate = BatchEvaluator(game)
+    restart = restart or RestartPolicy()
+    restart.start()
+
+    # Composition of the new population.
+    n_elite = int(elitism * pop_size)
+    n_newborns = int(crossover * pop_size)
+    n_survivors = pop_size - n_elite - n_newborns
+
+    # Population.
+    population = Population(game, pop_size)
+    population.randomize(evaluate)
+
+    # Evolution.
+    best_solution = ''
+    best_fitness = 0
+    for g in range(1, generations + 1):
+
+        # Gather information.
+        game.stats.generations += 1
+        fitness = population.fitness
+        maximum, minimum = int(fitness.max()), int(fitness.min())
+        average = round(float(fitness.mean()), 2)
+        value = diversity(population.genes, restart.samples, game.np_rng)
+        game.stats.history.append(g, minimum, maximum, average, value)
+
+        # Print information.
+        if verbose and g % 10 == 0:
+            print_generation(g, minimum, average, maximum, best_fitness,
+                             game.stats.fitness_calls)
+
+        # Optimization.
+        if optim == 'lamark':
+            indexes = game.np_rng.permutation(pop_size)[:int(0.8 * pop_size)]
+            genes, scores = optimize_batch(game, population.genes[indexes],
+                                           population.fitness[indexes],
+                                           evaluate)
+            population.genes[indexes] = genes
+            population.fitness[indexes] = scores
+        elif optim == 'darwin':
+            genes, scores = optimize_batch(game, population.genes,
+                                           population.fitness, evaluate)
+            k = int(np.argmax(scores))
+            if best_fitness < scores[k]:
+                best_solution = genes[k].tolist()
+                best_fitness = int(scores[k])
+
+        # Sort solutions and mark the best one.
+        population.sort()
+        if best_fitness < population.fitness[0]:
+            best_solution = population.genes[0].tolist()
+            best_fitness = int(population.fitness[0])
+
+        # Keep the best solution so far available (anytime) and report it.
+        if game.stats.fitness < best_fitness:
+            game.stats.solution = best_solution
+            game.stats.fitness = best_fitness
+            if progress:
+                progress(g, game.stats)
+
+        # Stopping condition.
+        if best_fitness == game.n_constraints:
+            if verbose:
+                print(f'Generation {g}:  A legal solution has been found!')
+            break
+
+        # Stop if cancelled (e.g., by the user) or out of budget.
+        if token.check(game.stats):
+            game.stats.stop_reason = token.reason
+            break
+
+        # Let the caller inspect the population, or stop the run.
+        if on_generation and on_generation(g, population.genes):
+            break
+
+        # Early convergence (or stagnation) handling - the best individuals
+        # are kept and the rest of the population is replaced.
+        if restart.update(maximum, minimum, value):
+            n_keep = restart.n_keep(pop_size)
+            game.stats.restarts += 1
+            game.stats.restart_generations.append(g)
+            if verbose:
+                print(f'Generation {g}:  STAGNATED! Restart calculations '
+                      f'(keeping the best {n_keep})...')
+            population.randomize(evaluate, n_keep)
+            continue
+
+        # Build the next generation in the second buffer: elites, survivors
+        # (replication without repetitions) and newborns (cross-over).
+        genes, fitness = population.genes, population.fitness
+        next_genes = population.next_genes
+        next_fitness = population.next_fitness
+        next_genes[:n_elite] = genes[:n_elite]
+        next_fitness[:n_elite] = fitness[:n_elite]
+        survivors = select(fitness, n_survivors, selection, replace=False,
+                           rng=game.np_rng)
+        k = n_elite + n_survivors
+        np.take(genes, survivors, axis=0, out=next_genes[n_elite:k])
+        np.take(fitness, survivors, out=next_fitness[n_elite:k])
+        game.stats.cross_over_calls += n_newborns
+        parents = select(fitness, (n_newborns, 2), selection,
+                         rng=game.np_rng)
+        cross_over(genes, parents[:, 0], parents[:, 1], next_genes[k:],
+                   game.np_rng)
+        evaluate(next_genes[k:], out=next_fitness[k:])
+        population.swap()
+
+        # Mutation - a mutant replaces its origin if it is better, or at the
+        # (adaptive) acceptance rate, so the non-elites are mutated in place
+        # and the other mutations are undone.
+        non_elites = population.genes[n_elite:]
+        non_elites_fitness = population.fitness[n_elite:]
+        mutations = mutate(game, non_elites)
+        mutants_fitness = evaluate(non_elites)
+        rejected = mutants_fitness <= non_elites_fitness
+        acceptance_rate = restart.acceptance_rate
+        if acceptance_rate:
+            rejected &= game.np_rng.random(len(rejected)) >= acceptance_rate
+        undo(non_elites, mutations, rejected)
+        np.copyto(non_elites_fitness, mutants_fitness, where=~rejected)
+
+    # Update and return statistics (that contains the solution).
+    game.stats.solution = best_solution
+    game.stats.fitness = best_fitness
+    game.stats.runtime = str(datetime.now() - start).split(".")[0]
+    return game.stats
@@ -0,0 +1,158 @@
+# File: board.py
+# Content: a board representation that keeps, for every row and column, how
+# many times each digit is used in it, so constraint checks are count and
+# bitmask arithmetic that is updated incrementally when a single cell changes.
+
+
+class Board:
+    """
+    An instance of this class holds the digits of a game's board (a matrix, 0
+    for an empty cell) together with:
+    * For each row and each column, a count array of its digits and a bitmask
+      of the digits it uses (bit v is set if the digit v is used).
+    * The number of cells whose digit appears in another cell of their row,
+      and the same for columns (the unsatisfied row/column-constraints).
+    * The number of unsatisfied relation-constraints.
+    Setting a cell updates all of them in O(n + r) time, where r is the number
+    of relations of the cell, instead of re-checking the whole board.
+    """
+
+    def __init__(self, game):
+        """
+        Constructor. Creates an empty board with the game's given digits.
+        :param game: a Futoshiki game object.
+        """
+        n = game.dim
+        self.dim = n
+        self.cells = game.cells
+        self.smaller = game.smaller
+        self.incident = game.incident
+        self.n_constraints = game.n_constraints
+        self.matrix = [[0 for _ in range(n)] for _ in range(n)]
+        self.row_counts = [[0] * (n + 1) for _ in range(n)]
+        self.col_counts = [[0] * (n + 1) for _ in range(n)]
+        self.row_used = [0] * n
+        self.col_used = [0] * n
+        self.duplicates = 0
+        self.violated = len(game.relations)  # Empty cells break relations.
+        for (i, j), v in game.given.items():
+            self.set(i, j, v)
+
+    def set(self, i, j, v):
+        """
+        This method sets the digit v in the i,j-cell and updates the counts.
+        :param i: row of the cell.
+        :param j: column of the cell.
+        :param v: a digit (or 0 to empty the cell).
+        :return: None.
+        """
+        matrix = self.matrix
+        old = matrix[i][j]
+        if old == v:
+            return
+        relations = self.incident[(i, j)]
+        for a, b, c, d in relations:
+            if matrix[a][b] <= matrix[c][d]:
+                self.violated -= 1
+        rows, cols = self.row_counts[i], self.col_counts[j]
+        duplicates = self.duplicates
+
+        # Remove the old digit. A count that drops from 2 to 1 leaves no
+        # duplicates, and from 1 to 0 frees the digit in the line.
+        if old:
+            k = rows[old]
+            rows[old] = k - 1
+            if k == 1:
+                self.row_used[i] ^= 1 << old
+            else:
+                duplicates -= 2 if k == 2 else 1
+            k = cols[old]
+            cols[old] = k - 1
+            if k == 1:
+                self.col_used[j] ^= 1 << old
+            else:
+                duplicates -= 2 if k == 2 else 1
+
+        # Add the new digit (symmetrically).
+        matrix[i][j] = v
+        if v:
+            k = rows[v]
+            rows[v] = k + 1
+            if k == 0:
+                self.row_used[i] |= 1 << v
+            else:
+                duplicates += 2 if k == 1 else 1
+            k = cols[v]
+            cols[v] = k + 1
+            if k == 0:
+                self.col_used[j] |= 1 << v
+            else:
+                duplicates += 2 if k == 1 else 1
+        self.duplicates = duplicates
+        for a, b, c, d in relations:
+            if matrix[a][b] <= matrix[c][d]:
+                self.violated += 1
+
+    def load(self, solution):
+        """
+        This method sets a solution in the free cells of the board. Only the
+        cells whose digits differ from the current ones are updated, so loading
+        a vector that is similar to the previous one is cheap.
+        :param solution: a vector of natural numbers.
+        :return: None.
+        """
+        matrix = self.matrix
+        for k, (i, j) in enumerate(self.cells):
+            if matrix[i][j] != solution[k]:
+                self.set(i, j, solution[k])
+
+    def clear(self):
+        """
+        This method empties the free cells of the board.
+        :return: None.
+        """
+        for i, j in self.cells:
+            self.set(i, j, 0)
+
+    def score(self):
+        """
+        This method counts the constraints the board satisfies.
+        :return: fitness score - the number of satisfied constraints.
+        """
+        return self.n_constraints - self.duplicates - self.violated
+
+    def penalty(self, i, j):
+        """
+        This method counts the kinds of constraints that the digit of the
+        i,j-cell does not satisfy - a duplicate in its column, a duplicate in
+        its row, and a relation in which it must be greater (at most 3).
+        :param i: row of the cell.
+        :param j: column of the cell.
+        :return: the number of unsatisfied constraints.
+        """
+        matrix = self.matrix
+        v = matrix[i][j]
+        result = (self.col_counts[j][v] > 1) + (self.row_counts[i][v] > 1)
+        for c, d in self.smaller[(i, j)]:
+            if v <= matrix[c][d]:
+                return result + 1
+        return result
+
+    def free_digits(self, i, j):
+        """
+        This method finds the digits that no other cell of the i,j-cell's row
+        and column uses.
+        :param i: row of the cell.
+        :param j: column of the cell.
+        :return: a bitmask of digits (bit v is set if the digit v is free).
+        """
+        v = self.matrix[i][j]
+        bit = 1 << v
+        row = self.row_used[i]
+        col = self.col_used[j]
+        if self.row_counts[i][v] == 1:
+            row &= ~bit  # The digit is used only by the cell itself.
+        if self.col_counts[j][v] == 1:
+            col &= ~bit
+        full = (1 << (self.dim + 1)) - 2
+        return full & ~(row | col)
@@ -0,0 +1,62 @@
+# File: cache.py
+# Content: a bounded cache of fitness scores of solution vectors.
+
+
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    An instance of this class remembers the fitness scores of recently
+    evaluated solution vectors, so identical vectors (e.g., copied survivors,
+    mutants that swapped two equal values, or the duplicates of a converged
+    population) are not evaluated again. A vector is keyed by its bytes, one
+    per cell, which is compact and exact. Once the cache is full, the least
+    recently used score is evicted. A hit returns the score without loading
+    the vector to the game's board, so the board may still hold another one.
+    """
+
+    def __init__(self, max_size=10000):
+        """
+        Constructor.
+        :param max_size: maximal number of cached scores.
+        """
+        self.max_size = max_size
+        self.scores = OrderedDict()
+
+    @staticmethod
+    def key(vector):
+        """
+        Creates the cache key of a vector.
+        :param vector: a vector of natural numbers (each one below 256).
+        :return: a bytes object.
+        """
+        return bytes(vector)
+
+    def get(self, key, stats):
+        """
+        Looks for the score of a vector, and counts a hit or a miss.
+        :param key: the key of the vector.
+        :param stats: a Statistics object.
+        :return: the score, or None if it is not cached.
+        """
+        score = self.scores.get(key)
+        if score is None:
+            stats.cache_misses += 1
+        else:
+            stats.cache_hits += 1
+            self.scores.move_to_end(key)
+        return score
+
+    def put(self, key, score):
+        """
+        Caches the score of a vector, and evicts the least recently used score
+        if the cache is full.
+        :param key: the key of the vector.
+        :param score: the fitness of the vector.
+        :return: None.
+        """
+        self.scores[key] = score
+        self.scores.move_to_end(key)
+        if len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
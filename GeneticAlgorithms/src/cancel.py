@@ -0,0 +1,114 @@
+# File: cancel.py
+# Content: a cancellation token that tells a running solver when to stop.
+
+
+from contextlib import contextmanager
+from signal import signal, SIGINT
+from time import monotonic
+
+
+# Stop reasons.
+CANCELLED = 'cancelled'
+TIME = 'time budget'
+EVALUATIONS = 'evaluations budget'
+
+
+class CancellationToken:
+    """
+    An instance of this class tells a solver when to stop. A token can be
+    cancelled explicitly, by a signal (e.g., ctrl+c), by another process (using
+    a shared event), or when a time budget or a fitness calls budget runs out.
+    Checking a token is cheap, so a solver can check it every generation.
+    """
+
+    def __init__(self, time_budget=None, max_evaluations=None, event=None,
+                 parent=None):
+        """
+        Constructor. The time budget starts once the token is created.
+        :param time_budget: seconds the solver may run (None means unlimited).
+        :param max_evaluations: fitness calls the solver may perform, or search
+               nodes it may visit (None means unlimited).
+        :param event: an optional threading/multiprocessing Event object that
+               cancels the token once it is set.
+        :param parent: an optional token that cancels this token once it stops
+               (see run()).
+        """
+        self.time_budget = time_budget
+        self.max_evaluations = max_evaluations
+        self.event = event
+        self.parent = parent
+        self.deadline = None
+        self.reason = None
+        if time_budget is not None:
+            self.deadline = monotonic() + time_budget
+
+    @staticmethod
+    def run(token=None, time_budget=None, max_evaluations=None):
+        """
+        Creates the token of a single solver run. The run stops once the
+        caller's token stops, or once the run's own budgets run out, so the
+        caller's token is never modified and can be shared by several runs.
+        :param token: the caller's CancellationToken, if any.
+        :param time_budget: seconds the run may take (None means unlimited).
+        :param max_evaluations: fitness calls or search nodes the run may
+               perform (None means unlimited).
+        :return: a new CancellationToken.
+        """
+        return CancellationToken(time_budget, max_evaluations, parent=token)
+
+    def start(self):
+        """
+        This method resets the token, so it can be reused - it clears the stop
+        reason and the event, and restarts the time budget. Only the owner of a
+        token should call it, as clearing a shared event resumes every run that
+        checks it.
+        :return: None.
+        """
+        self.reason = None
+        if self.event is not None:
+            self.event.clear()
+        self.deadline = None
+        if self.time_budget is not None:
+            self.deadline = monotonic() + self.time_budget
+
+    def cancel(self):
+        """
+        This method cancels the token.
+        :return: None.
+        """
+        self.reason = CANCELLED
+
+    def check(self, stats=None):
+        """
+        This method checks if the solver should stop.
+        :param stats: the solver's Statistics object (for the fitness calls, or
+               the search nodes of the exact solver).
+        :return: True if the solver should stop, False otherwise.
+        """
+        if self.reason is None:
+            if self.parent is not None and self.parent.check(stats):
+                self.reason = self.parent.reason
+            elif self.event is not None and self.event.is_set():
+                self.reason = CANCELLED
+            elif self.deadline is not None and monotonic() >= self.deadline:
+                self.reason = TIME
+            elif self.max_evaluations is not None and stats is not None \
+                    and stats.fitness_calls + stats.nodes \
+                    >= self.max_evaluations:
+                self.reason = EVALUATIONS
+        return self.reason is not None
+
+    @contextmanager
+    def handle_signals(self, signals=(SIGINT,)):
+        """
+        A context manager that cancels the token when one of the given signals
+        is received (ctrl+c by default), instead of raising KeyboardInterrupt.
+        The previous handlers are restored at the end.
+        :param signals: signal numbers to handle.
+        """
+        previous = {s: signal(s, lambda *args: self.cancel()) for s in signals}
+        try:
+            yield self
+        finally:
+            for s, handler in previous.items():
+                signal(s, handler)
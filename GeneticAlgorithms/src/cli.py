@@ -5,8 +5,16 @@
 from sys import exit
 from os.path import exists
 from prettytable import PrettyTable
-from src.game import Futoshiki
+from src.game import parse_game
 from src.solver import genetic_solver
+from src.batch import batch_genetic_solver
+from src.parallel import island_solver, portfolio_solver, RING, FULL
+from src.cancel import CancellationToken, CANCELLED, TIME, EVALUATIONS
+from src.selection import METHODS, ROULETTE
+from src.permutation import CELLS, ROWS
+from src.propagation import solve_reduced
+from src.exact import exact_solver
+from src.stats import HISTORY_SIZE
 
 
 # Program's states.
@@ -20,7 +28,9 @@ HELP = 'Help message:\n' \
        '* You must provide an input file in to the input field.\n' \
        '* The other fields are set to default values.\n' \
        '* Once the fields are set you can run the program by typing \'r\'.\n' \
-       '* Once started, you can stop the run by hitting \'ctrl+0\'.\n' \
+       '* Once started, you can stop the run by hitting \'ctrl+c\'.\n' \
+       '* A run restarts (keeping its best solutions) once its population has' \
+       ' converged or its best fitness has stagnated.\n' \
        '* To view this help message you can type \'h\'.\n' \
        '* To end the program type \'q\'.'
 
@@ -51,6 +61,10 @@ class FutoshikiCli:
         self.state = STOPPED
         self.file = ''
         self.to_plot = False
+        self.vectorized = False
+        self.portfolio = False
+        self.propagate = False
+        self.exact = False
         self.game = None
 
         # Experiment parameters.
@@ -59,6 +73,16 @@ class FutoshikiCli:
         self.elitism = 0.01
         self.crossover = 0.8
         self.optim = None
+        self.selection = ROULETTE
+        self.encoding = CELLS
+        self.islands = 1
+        self.topology = RING
+        self.time_budget = None
+        self.max_evaluations = None
+        self.cache_size = None
+        self.seed = None
+        self.history_size = HISTORY_SIZE
+        self.downsample = False
 
         # Command dictionary - define commands and their description and action.
         self.commands = {
@@ -83,10 +107,74 @@ class FutoshikiCli:
                 description='Set an optimization method (\"Lamark\", '
                             '\"Darwin\" or \"None\").',
                 action=self.__set_optim),
+            'sl': Command(
+                description='Set a selection method (\"Roulette\", \"SUS\", '
+                            '\"Tournament\" or \"Rank\").',
+                action=self.__set_selection),
+            'en': Command(
+                description='Set the encoding of solutions (\"Cells\" - any '
+                            'cell takes any digit, or \"Rows\" - each row is a'
+                            ' permutation).',
+                action=self.__set_encoding),
             'f': Command(
                 description='Show figure in the end of the experiment (assign '
                             '\"true\" or \"false\").',
                 action=self.__show_figure),
+            'v': Command(
+                description='Evolve the population as NumPy arrays (assign '
+                            '\"true\" or \"false\").',
+                action=self.__set_vectorized),
+            'n': Command(
+                description='Set the number of islands (parallel populations '
+                            'with migration, 1 means a single population).',
+                action=self.__set_islands),
+            't': Command(
+                description='Set the islands\' migration topology (\"Ring\" '
+                            'or \"Full\").',
+                action=self.__set_topology),
+            'pf': Command(
+                description='Race a portfolio of configurations in parallel and'
+                            ' stop on the first success (assign \"true\" or '
+                            '\"false\").',
+                action=self.__set_portfolio),
+            'b': Command(
+                description='Set a time budget in seconds, after which the '
+                            'best solution so far is shown ("None" for no '
+                            'budget).',
+                action=self.__set_time_budget),
+            'ev': Command(
+                description='Set a budget of fitness calls, after which the '
+                            'best solution so far is shown ("None" for no '
+                            'budget).',
+                action=self.__set_max_evaluations),
+            'fc': Command(
+                description='Set the size of the fitness cache, which saves '
+                            'evaluating identical solutions again ("None" for'
+                            ' no cache).',
+                action=self.__set_cache_size),
+            'cp': Command(
+                description='Narrow the digits of the cells by constraint '
+                            'propagation before solving (assign \"true\" or '
+                            '\"false\").',
+                action=self.__set_propagate),
+            'x': Command(
+                description='Solve by exact backtracking search instead of the '
+                            'genetic algorithm (assign \"true\" or \"false\").',
+                action=self.__set_exact),
+            'sd': Command(
+                description='Set the seed of the random streams, which makes '
+                            'runs reproducible ("None" for a fresh seed per '
+                            'run).',
+                action=self.__set_seed),
+            'hs': Command(
+                description='Set the maximal number of generations recorded in '
+                            'the fitness history.',
+                action=self.__set_history_size),
+            'ds': Command(
+                description='Keep every other generation of the whole run once '
+                            'the history is full, instead of the most recent '
+                            'ones (assign \"true\" or \"false\").',
+                action=self.__set_downsample),
             'r': Command(
                 description='Run genetic solution (input required)',
                 action=None),
@@ -111,7 +199,21 @@ class FutoshikiCli:
             'mutate_prob': 'mp',
             'mutate_rate': 'mr',
             'optimization': 'o',
+            'selection': 'sl',
+            'encoding': 'en',
             'figure': 'f',
+            'vectorized': 'v',
+            'islands': 'n',
+            'topology': 't',
+            'portfolio': 'pf',
+            'budget': 'b',
+            'evaluations': 'ev',
+            'cache': 'fc',
+            'propagation': 'cp',
+            'exact': 'x',
+            'seed': 'sd',
+            'history': 'hs',
+            'downsample': 'ds',
             'run': 'r',
             'settings': 's',
             'help': 'h',
@@ -144,37 +246,12 @@ class FutoshikiCli:
 
         # Parse file.
         try:
-            offset = 0  # the offset is the current line the method reads.
-            mat_size = int(lines[offset])
-            offset += 1
-            n_given = int(lines[offset])
-            offset += 1
-            given_digits = []
-            for i in range(n_given):
-                given_row = lines[offset].split(' ')
-                given_tup = int(given_row[0]), int(given_row[1]), int(given_row[2])
-                for x in given_tup:
-                    if x < 1 or x > mat_size:
-                        raise ValueError
-                given_digits.append(given_tup)
-                offset += 1
-            n_relations = int(lines[offset])
-            offset += 1
-            relations = []
-            for i in range(n_relations):
-                relation_row = lines[offset].split(' ')
-                relation_tup = (int(relation_row[0]), int(relation_row[1]),
-                                int(relation_row[2]), int(relation_row[3]))
-                for x in relation_tup:
-                    if x < 1 or x > mat_size:
-                        raise ValueError
-                relations.append(relation_tup)
-                offset += 1
+            game = parse_game(lines)
             split_path = input_file.split('/')
             if len(split_path) == 1:
                 split_path = input_file.split('\\')
             self.file = split_path[-1]
-            self.game = Futoshiki(mat_size, given_digits, relations)
+            self.game = game
             print('Game input file successfully parsed.')
             return True
         except KeyboardInterrupt:
@@ -279,6 +356,35 @@ class FutoshikiCli:
             print('Optimization should be \"Lamark\", \"Darwin\" or \"None\".')
             return False
 
+    def __set_selection(self, x):
+        """
+        This command action sets the selection method to x if x is valid.
+        :param x: user input - a string that represents a selection method.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl in METHODS:
+            self.selection = xl
+            print(f'{x} selection set.')
+            return True
+        print('Selection should be \"Roulette\", \"SUS\", \"Tournament\" '
+              'or \"Rank\".')
+        return False
+
+    def __set_encoding(self, x):
+        """
+        This command action sets the encoding of solutions to x if x is valid.
+        :param x: user input - a string that represents an encoding.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == CELLS or xl == ROWS:
+            self.encoding = xl
+            print(f'{x} encoding set.')
+            return True
+        print('Encoding should be \"Cells\" or \"Rows\".')
+        return False
+
     def __show_figure(self, x):
         """
         This command action makes the program show/hide plot in the end of the
@@ -299,6 +405,249 @@ class FutoshikiCli:
             print('Plot assignment should be \"true\" or \"false\".')
             return False
 
+    def __set_vectorized(self, x):
+        """
+        This command action makes the program use the vectorized solver or the
+        regular one according to x.
+        :param x: user input - a string that represents True or False.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == 'true' or xl == 't':
+            self.vectorized = True
+        elif xl == 'false' or xl == 'f':
+            self.vectorized = False
+        else:
+            print('Vectorized assignment should be \"true\" or \"false\".')
+            return False
+        print(f'Vectorized set to {self.vectorized}')
+        return True
+
+    def __set_islands(self, x):
+        """
+        This command action sets the number of islands to x if x is valid.
+        :param x: user input - a string that represents a natural number.
+        :return: True if succeeded, False otherwise.
+        """
+        try:
+            xi = int(x)
+            if xi < 1:
+                raise ValueError
+            self.islands = xi
+            print(f'Number of islands set to {xi}.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('Number of islands should be a positive integer.')
+            return False
+
+    def __set_topology(self, x):
+        """
+        This command action sets the migration topology to x if x is valid.
+        :param x: user input - a string that represents a topology.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == RING or xl == FULL:
+            self.topology = xl
+            print(f'{x} topology set.')
+            return True
+        print('Topology should be \"Ring\" or \"Full\".')
+        return False
+
+    def __set_portfolio(self, x):
+        """
+        This command action makes the program race a portfolio of solver
+        configurations, or run the configured solver, according to x.
+        :param x: user input - a string that represents True or False.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == 'true' or xl == 't':
+            self.portfolio = True
+        elif xl == 'false' or xl == 'f':
+            self.portfolio = False
+        else:
+            print('Portfolio assignment should be \"true\" or \"false\".')
+            return False
+        print(f'Portfolio set to {self.portfolio}')
+        return True
+
+    def __set_time_budget(self, x):
+        """
+        This command action sets the time budget to x if x is valid.
+        :param x: user input - a string that represents a positive number of
+               seconds, or "none".
+        :return: True if succeeded, False otherwise.
+        """
+        if x.lower() == 'none':
+            self.time_budget = None
+            print('No time budget set.')
+            return True
+        try:
+            xf = float(x)
+            if xf <= 0:
+                raise ValueError
+            self.time_budget = xf
+            print(f'Time budget set to {xf} seconds.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('Time budget should be a positive number or \"None\".')
+            return False
+
+    def __set_max_evaluations(self, x):
+        """
+        This command action sets the budget of fitness calls to x if x is valid.
+        :param x: user input - a string that represents a natural number, or
+               "none".
+        :return: True if succeeded, False otherwise.
+        """
+        if x.lower() == 'none':
+            self.max_evaluations = None
+            print('No fitness calls budget set.')
+            return True
+        try:
+            xi = int(x)
+            if xi < 1:
+                raise ValueError
+            self.max_evaluations = xi
+            print(f'Fitness calls budget set to {xi}.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('Fitness calls budget should be a positive integer or '
+                  '\"None\".')
+            return False
+
+    def __set_cache_size(self, x):
+        """
+        This command action sets the size of the fitness cache to x if x is
+        valid.
+        :param x: user input - a string that represents a natural number, or
+               "none".
+        :return: True if succeeded, False otherwise.
+        """
+        if x.lower() == 'none':
+            self.cache_size = None
+            print('No fitness cache set.')
+            return True
+        try:
+            xi = int(x)
+            if xi < 1:
+                raise ValueError
+            self.cache_size = xi
+            print(f'Fitness cache size set to {xi}.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('Fitness cache size should be a positive integer or '
+                  '\"None\".')
+            return False
+
+    def __set_propagate(self, x):
+        """
+        This command action makes the program run constraint propagation before
+        solving, or not, according to x.
+        :param x: user input - a string that represents True or False.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == 'true' or xl == 't':
+            self.propagate = True
+        elif xl == 'false' or xl == 'f':
+            self.propagate = False
+        else:
+            print('Propagation assignment should be \"true\" or \"false\".')
+            return False
+        print(f'Propagation set to {self.propagate}')
+        return True
+
+    def __set_exact(self, x):
+        """
+        This command action makes the program use the exact solver or the
+        genetic one according to x.
+        :param x: user input - a string that represents True or False.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == 'true' or xl == 't':
+            self.exact = True
+        elif xl == 'false' or xl == 'f':
+            self.exact = False
+        else:
+            print('Exact assignment should be \"true\" or \"false\".')
+            return False
+        print(f'Exact set to {self.exact}')
+        return True
+
+    def __set_seed(self, x):
+        """
+        This command action sets the seed of the random streams to x if x is
+        valid.
+        :param x: user input - a string that represents a non-negative integer,
+               or "none".
+        :return: True if succeeded, False otherwise.
+        """
+        if x.lower() == 'none':
+            self.seed = None
+            print('No seed set.')
+            return True
+        try:
+            xi = int(x)
+            if xi < 0:
+                raise ValueError
+            self.seed = xi
+            print(f'Seed set to {xi}.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('Seed should be a non-negative integer or \"None\".')
+            return False
+
+    def __set_history_size(self, x):
+        """
+        This command action sets the maximal number of generations recorded in
+        the fitness history to x if x is valid.
+        :param x: user input - a string that represents a natural number.
+        :return: True if succeeded, False otherwise.
+        """
+        try:
+            xi = int(x)
+            if xi < 1:
+                raise ValueError
+            self.history_size = xi
+            print(f'History size set to {xi}.')
+            return True
+        except KeyboardInterrupt:
+            exit(-1)
+        except Exception:
+            print('History size should be a positive integer.')
+            return False
+
+    def __set_downsample(self, x):
+        """
+        This command action makes a full fitness history downsample or
+        overwrite its oldest generations according to x.
+        :param x: user input - a string that represents True or False.
+        :return: True if succeeded, False otherwise.
+        """
+        xl = x.lower()
+        if xl == 'true' or xl == 't':
+            self.downsample = True
+        elif xl == 'false' or xl == 'f':
+            self.downsample = False
+        else:
+            print('Downsample assignment should be \"true\" or \"false\".')
+            return False
+        print(f'Downsample set to {self.downsample}')
+        return True
+
     def __run(self):
         """
         This command action make the experiment running.
@@ -306,26 +655,84 @@ class FutoshikiCli:
         """
         if self.game:
 
-            # Run genetic algorithm on the given parameters.
-            stats = genetic_solver(game=self.game,
-                                   generations=self.generations,
-                                   pop_size=self.pop_size,
-                                   elitism=self.elitism,
-                                   crossover=self.crossover,
-                                   optim=self.optim,
-                                   to_plot=self.to_plot)
-
-            # If not stopped by the user, print info and maybe show plot.
-            if stats:
+            # Run genetic algorithm on the given parameters. Hitting ctrl+c
+            # cancels the token, and the solver returns the best solution so
+            # far, as does running out of the time or fitness calls budgets.
+            if self.vectorized and self.islands > 1:
+                print('Error! The vectorized solver does not support islands.')
+                return False
+            if self.encoding == ROWS and (self.optim or self.vectorized):
+                print('Error! The rows encoding does not support optimization '
+                      'or the vectorized solver.')
+                return False
+            if self.exact and (self.vectorized or self.islands > 1 or
+                               self.portfolio):
+                print('Error! The exact solver does not support the vectorized '
+                      'solver, islands or portfolios.')
+                return False
+            if self.cache_size and (self.vectorized or self.exact or
+                                    self.portfolio):
+                print('Error! The fitness cache is not supported by the '
+                      'vectorized solver, the exact solver or portfolios.')
+                return False
+            # The token holds the time budget, and the solvers count their own
+            # fitness calls (or search nodes) against max_evaluations.
+            token = CancellationToken(time_budget=self.time_budget)
+            params = dict(game=self.game,
+                          generations=self.generations,
+                          pop_size=self.pop_size,
+                          token=token,
+                          max_evaluations=self.max_evaluations,
+                          history_size=self.history_size,
+                          downsample=self.downsample)
+            if self.exact:
+                solver = exact_solver
+                params = dict(game=self.game, token=token,
+                              max_evaluations=self.max_evaluations)
+            elif self.portfolio:
+                solver = portfolio_solver
+                params.update(seed=self.seed)
+            else:
+                params.update(elitism=self.elitism,
+                              crossover=self.crossover,
+                              optim=self.optim,
+                              selection=self.selection,
+                              encoding=self.encoding,
+                              seed=self.seed)
+                if self.islands > 1:
+                    solver = island_solver
+                    params.update(islands=self.islands,
+                                  topology=self.topology,
+                                  cache_size=self.cache_size)
+                elif self.vectorized:
+                    solver = batch_genetic_solver
+                else:
+                    solver = genetic_solver
+                    params.update(cache_size=self.cache_size)
+            with token.handle_signals():
+                try:
+                    if self.propagate:
+                        stats = solve_reduced(solver, **params)
+                    else:
+                        stats = solver(**params)
+                except ValueError as e:
+                    print(f'Error! {e}')
+                    return False
+
+            # Print info and maybe show plot.
+            if stats.stop_reason == CANCELLED:
+                print('\nStopped. Showing the best solution found so far.')
+            elif stats.stop_reason in (TIME, EVALUATIONS):
+                print(f'\nOut of {stats.stop_reason}. Showing the best '
+                      f'solution found so far.')
+            else:
                 print('\nCalculations completed!')
-                stats.correctness = self.game.validate(stats.solution)
-                stats.solution_matrix = self.game.matrix
-                stats.print_stats()
-                if self.to_plot:
-                    stats.show_plot()
-                return True
-            print('\nStopped.')
-            return False
+            stats.correctness = self.game.validate(stats.solution)
+            stats.solution_matrix = self.game.matrix
+            stats.print_stats()
+            if self.to_plot and not self.exact:
+                stats.show_plot()
+            return True
         else:
             print('Error! Please provide an input file and then try again.')
             return False
@@ -341,7 +748,21 @@ class FutoshikiCli:
         print(f'Elitism:         {self.elitism}')
         print(f'Cross-over:      {self.crossover}')
         print(f'Optimization:    {self.optim}')
+        print(f'Selection:       {self.selection}')
+        print(f'Encoding:        {self.encoding}')
         print(f'Plot:            {self.to_plot}')
+        print(f'Vectorized:      {self.vectorized}')
+        print(f'Islands:         {self.islands}')
+        print(f'Topology:        {self.topology}')
+        print(f'Portfolio:       {self.portfolio}')
+        print(f'Propagation:     {self.propagate}')
+        print(f'Exact:           {self.exact}')
+        print(f'Time budget:     {self.time_budget}')
+        print(f'Calls budget:    {self.max_evaluations}')
+        print(f'Fitness cache:   {self.cache_size}')
+        print(f'Seed:            {self.seed}')
+        print(f'History size:    {self.history_size}')
+        print(f'Downsample:      {self.downsample}')
         print()
         return True
 
@@ -0,0 +1,261 @@
+# File: exact.py
+# Content: an exact solver - backtracking search with forward checking, MRV
+# variable ordering and bitset domains, which always finds a legal solution
+# (or proves there is none) given enough time.
+
+
+from datetime import datetime
+from src.stats import Statistics
+from src.cancel import CancellationToken
+from src.propagation import propagate
+from src.utils import fitness
+
+
+# Number of search nodes between checks of the token.
+CHECK_INTERVAL = 1024
+
+
+def lowest(mask):
+    """
+    This function returns the smallest digit of a bitset domain.
+    :param mask: a non-empty bitset domain.
+    :return: a digit.
+    """
+    return (mask & -mask).bit_length() - 1
+
+
+class Search:
+    """
+    An instance of this class searches for legal assignments of a game's cells
+    by depth-first search:
+    * The domain of each cell is a bitset of its possible digits (bit v is set
+      if the digit v is possible), initialized by constraint propagation (see
+      propagation.py).
+    * The next cell to assign is the one with the fewest possible digits (MRV),
+      and ties are broken by the number of relations of the cell.
+    * Assigning a digit removes it from the domains of the cell's row and
+      column, and removes the digits that break its relations from the domains
+      of the related cells (forward checking). If a domain becomes empty, the
+      assignment is undone at once.
+    """
+
+    def __init__(self, game, stats, token=None, rng=None, verbose=False):
+        """
+        Constructor. Initializes the domains and the constraint graph.
+        :param game: a Futoshiki game object.
+        :param stats: a Statistics object that counts the search nodes and
+               backtracks.
+        :param token: an optional CancellationToken that is checked every
+               CHECK_INTERVAL search nodes.
+        :param rng: an optional random.Random object. If given, the digits of
+               each cell are tried in a random order (instead of increasing).
+        :param verbose: a boolean that tells if to print progress.
+        :raise: ValueError if propagation shows that the game has no solution.
+        """
+        n = game.dim
+        self.dim = n
+        self.stats = stats
+        self.token = token or CancellationToken()
+        self.rng = rng
+        self.verbose = verbose
+        self.domain = [0] * (n * n)
+        for (i, j), values in propagate(game).items():
+            for v in values:
+                self.domain[i * n + j] |= 1 << v
+        self.peers = [[i * n + y for y in range(n) if y != j] +
+                      [x * n + j for x in range(n) if x != i]
+                      for i in range(n) for j in range(n)]
+        self.smaller = [[c * n + d for c, d in game.smaller[(i, j)]]
+                        for i in range(n) for j in range(n)]
+        self.greater = [[a * n + b for a, b in game.greater[(i, j)]]
+                        for i in range(n) for j in range(n)]
+        self.degree = [len(self.smaller[k]) + len(self.greater[k])
+                       for k in range(n * n)]
+        self.free = {k for k in range(n * n)
+                     if self.domain[k] & (self.domain[k] - 1)}
+        self.solutions = []
+        self.limit = 1
+        self.deepest = len(self.free) + 1
+        self.on_deeper = None
+
+    def board(self, domain=None):
+        """
+        This method converts domains to a matrix of digits (the smallest digit
+        of each cell).
+        :param domain: a list of bitset domains (the current ones by default).
+        :return: a matrix of digits.
+        """
+        domain = domain or self.domain
+        n = self.dim
+        return [[lowest(domain[i * n + j]) for j in range(n)]
+                for i in range(n)]
+
+    def run(self, limit=1):
+        """
+        This method searches for legal assignments of the free cells.
+        :param limit: the search stops once it finds this number of them.
+        :return: a list of up to 'limit' solutions (matrices of digits). It is
+                 shorter if there are no more solutions, or if the token
+                 stopped the search (see token.reason).
+        """
+        self.solutions = []
+        self.limit = limit
+        self.__search()
+        return self.solutions
+
+    def __assign(self, k, bit, trail):
+        """
+        Assigns the digit of the given bit to the k-cell and prunes the domains
+        of the related free cells. Every changed domain is saved in the trail.
+        :return: False if a domain became empty, True otherwise.
+        """
+        domain, free = self.domain, self.free
+        for p in self.peers[k]:
+            if p in free and domain[p] & bit:
+                trail.append((p, domain[p]))
+                domain[p] &= ~bit
+                if not domain[p]:
+                    return False
+        below = bit - 1  # The digits that are smaller than the assigned one.
+        for s in self.smaller[k]:
+            if s in free and domain[s] & ~below:
+                trail.append((s, domain[s]))
+                domain[s] &= below
+                if not domain[s]:
+                    return False
+        above = ~((bit << 1) - 1)  # The digits that are greater.
+        for g in self.greater[k]:
+            if g in free and domain[g] & ~above:
+                trail.append((g, domain[g]))
+                domain[g] &= above
+                if not domain[g]:
+                    return False
+        return True
+
+    def __search(self):
+        """
+        Searches recursively for legal assignments of the free cells.
+        :return: True if the search should stop (enough solutions were found,
+                 or the token stopped it), False otherwise.
+        """
+        domain, free, stats = self.domain, self.free, self.stats
+        if len(free) < self.deepest:
+            self.deepest = len(free)
+            if self.on_deeper:
+                self.on_deeper(self)
+        if not free:
+            self.solutions.append(self.board())
+            return len(self.solutions) >= self.limit
+        k = min(free, key=lambda c: (bin(domain[c]).count('1'),
+                                     -self.degree[c]))
+        free.remove(k)
+        bits = []
+        mask = domain[k]
+        while mask:
+            bits.append(mask & -mask)
+            mask ^= bits[-1]
+        if self.rng:
+            self.rng.shuffle(bits)
+        stop = False
+        for bit in bits:
+            stats.nodes += 1
+            if stats.nodes % CHECK_INTERVAL == 0:
+                if self.verbose and stats.nodes % (CHECK_INTERVAL * 100) == 0:
+                    n = self.dim
+                    print(f'Nodes {stats.nodes}:  Backtracks: '
+                          f'{stats.backtracks} | Deepest: '
+                          f'{n * n - self.deepest} of {n * n} cells')
+                if self.token.check(stats):
+                    stop = True
+                    break
+            trail = [(k, domain[k])]
+            domain[k] = bit
+            if self.__assign(k, bit, trail) and self.__search():
+                stop = True
+            for p, old in reversed(trail):
+                domain[p] = old
+            if stop or self.token.reason:
+                stop = True
+                break
+            stats.backtracks += 1
+        free.add(k)
+        return stop
+
+
+def count_solutions(game, limit=2, token=None):
+    """
+    This function counts the solutions of a game, up to a limit. E.g., with the
+    default limit a game has a unique solution if the count is 1.
+    :param game: a Futoshiki game object.
+    :param limit: the counting stops once it reaches this number.
+    :param token: an optional CancellationToken that stops the counting.
+    :return: the number of solutions found (up to 'limit'), and a list of them
+             (matrices of digits).
+    """
+    try:
+        search = Search(game, Statistics(), token)
+    except ValueError:
+        return 0, []
+    solutions = search.run(limit)
+    return len(solutions), solutions
+
+
+def exact_solver(game, token=None, time_budget=None, max_evaluations=None,
+                 progress=None, verbose=True):
+    """
+    This function solves the game by a depth-first search over the cells (see
+    Search).
+    :param game: a Futoshiki game object.
+    :param token: an optional CancellationToken that is checked every
+           CHECK_INTERVAL search nodes. Once it is cancelled (or its budget runs
+           out) the search stops, and the deepest partial assignment found so
+           far is returned, completed by the smallest possible digits.
+    :param time_budget: seconds the search may take.
+    :param max_evaluations: search nodes the search may visit.
+    :param progress: an optional function f(nodes, stats) that is called
+           whenever a deeper partial assignment is found, with the number of
+           search nodes and the Statistics object, which holds it.
+    :param verbose: a boolean that tells if to print progress.
+    :return: a Statistics object that contains the solution.
+    :raise: ValueError if the game has no solution.
+    """
+
+    # Timer & Statistics.
+    start = datetime.now()
+    stats = game.stats = Statistics()
+    token = CancellationToken.run(token, time_budget, max_evaluations)
+    search = Search(game, stats, token, verbose=verbose)
+
+    def vector(board):
+        return [board[i][j] for i, j in game.cells]
+
+    # The deepest partial assignment so far (anytime).
+    best = {'domain': search.domain.copy()}
+
+    def record(s):
+        best['domain'] = s.domain.copy()
+        if progress:
+            stats.solution = vector(s.board())
+            stats.fitness = fitness(game, stats.solution)
+            progress(stats.nodes, stats)
+
+    search.on_deeper = record
+
+    # Search.
+    if verbose:
+        print(f'Searching {len(search.free)} free cells...')
+    solutions = search.run()
+    if not solutions and token.reason is None:
+        raise ValueError('The game has no solution.')
+    if solutions:
+        if verbose:
+            print(f'Node {stats.nodes}:  A legal solution has been found!')
+    else:
+        stats.stop_reason = token.reason
+
+    # Update and return statistics (that contains the solution).
+    board = solutions[0] if solutions else search.board(best['domain'])
+    stats.solution = vector(board)
+    stats.fitness = fitness(game, stats.solution)
+    stats.runtime = str(datetime.now() - start).split(".")[0]
+    return stats
@@ -2,6 +2,11 @@
 # Content: a class represents a Futoshiki game and general methods.
 
 
+from random import Random
+import numpy as np
+from src.board import Board
+
+
 class Futoshiki:
     """
     An instance of this class represents a Futoshiki game and its settings. It
@@ -21,14 +26,62 @@ class Futoshiki:
         :param stats: a statistics object that helps gather and analyze info.
         """
         self.dim = mat_size
-        self.matrix = [[0 for _ in range(mat_size)] for _ in range(mat_size)]
         self.given = {(i - 1, j - 1): v for i, j, v in given_digits}
-        for i, j in self.given.keys():
-            self.matrix[i][j] = self.given[(i, j)]
         self.solution_size = mat_size * mat_size - len(given_digits)
+        self.cells = [(i, j) for i in range(mat_size) for j in range(mat_size)
+                      if (i, j) not in self.given]  # Vector index to cell.
+        self.index = {cell: k for k, cell in enumerate(self.cells)}
         self.relations = [(a-1, b-1, c-1, d-1) for (a, b, c, d) in relations]
+
+        # Constraint index - for each cell, the cells it must be greater than
+        # and the cells that must be greater than it, and the relations that
+        # touch it. For each row and column, the vector indexes of its cells
+        # and its given digits.
+        cells = [(i, j) for i in range(mat_size) for j in range(mat_size)]
+        self.smaller = {cell: [] for cell in cells}
+        self.greater = {cell: [] for cell in cells}
+        self.incident = {cell: [] for cell in cells}
+        for a, b, c, d in self.relations:
+            self.smaller[(a, b)].append((c, d))
+            self.greater[(c, d)].append((a, b))
+            self.incident[(a, b)].append((a, b, c, d))
+            self.incident[(c, d)].append((a, b, c, d))
+        self.row_index = [[] for _ in range(mat_size)]
+        self.col_index = [[] for _ in range(mat_size)]
+        for k, (i, j) in enumerate(self.cells):
+            self.row_index[i].append(k)
+            self.col_index[j].append(k)
+        self.row_given = [[] for _ in range(mat_size)]
+        self.col_given = [[] for _ in range(mat_size)]
+        for (i, j), v in self.given.items():
+            self.row_given[i].append(v)
+            self.col_given[j].append(v)
         self.n_constraints = 2 * mat_size * mat_size + len(relations)
+
+        # The board, which counts the digits of every row and column, and its
+        # matrix of digits (see board.py).
+        self.board = Board(self)
+        self.matrix = self.board.matrix
         self.stats = stats  # Optional.
+        self.cache = None  # Optional fitness cache (see cache.py).
+        self.domains = None  # Optional digits per vector index (propagation).
+
+        # The random streams of the genetic operators - a solver seeds them
+        # when it starts (see seeding.py).
+        self.rng = Random()
+        self.np_rng = np.random.default_rng()
+
+    def __getstate__(self):
+        """
+        This method defines what is pickled when a game is sent to another
+        process. The statistics object is left out, as it may hold a figure, and
+        so is the fitness cache.
+        :return: the object's attributes without the statistics and the cache.
+        """
+        state = self.__dict__.copy()
+        state['stats'] = None
+        state['cache'] = None
+        return state
 
     def set(self, solution):
         """
@@ -37,12 +90,7 @@ class Futoshiki:
         :param solution: a vector of natural numbers.
         :return: None.
         """
-        k = 0
-        for i in range(self.dim):
-            for j in range(self.dim):
-                if (i, j) not in self.given.keys():
-                    self.matrix[i][j] = solution[k]
-                    k += 1
+        self.board.load(solution)
 
     def validate(self, solution):
         """
@@ -51,26 +99,48 @@ class Futoshiki:
         :return: True if the solution is legal, False otherwise.
         """
         self.set(solution)
-        for x in range(self.dim):
-            for y in range(self.dim):
-                v = self.matrix[x][y]
-                for i in range(self.dim):
-                    if i != x and self.matrix[i][y] == v:
-                        return False  # hit row-constraint.
-                for j in range(self.dim):
-                    if j != y and self.matrix[x][j] == v:
-                        return False  # hit column-constraint.
-                for a, b, c, d in self.relations:
-                    if (x, y) == (a, b) and self.matrix[x][y] <= self.matrix[c][d]:
-                        return False  # hit relation-constraint.
-        return True  # If all constrains are satisfied.
+        return self.board.score() == self.n_constraints
 
     def reset(self):
         """
         This method allows removing solution from the game's matrix.
         :return:
         """
-        for i in range(self.dim):
-            for j in range(self.dim):
-                if (i, j) not in self.given.keys():
-                    self.matrix[i][j] = 0
+        self.board.clear()
+
+
+def parse_game(lines):
+    """
+    This function parses the lines of a game input file (see
+    input_template.txt) and creates a Futoshiki game.
+    :param lines: a list of the file's lines.
+    :return: a Futoshiki game object.
+    :raise: ValueError (or IndexError) if the input is invalid.
+    """
+    offset = 0  # the offset is the current line the function reads.
+    mat_size = int(lines[offset])
+    offset += 1
+    n_given = int(lines[offset])
+    offset += 1
+    given_digits = []
+    for i in range(n_given):
+        given_row = lines[offset].split(' ')
+        given_tup = int(given_row[0]), int(given_row[1]), int(given_row[2])
+        for x in given_tup:
+            if x < 1 or x > mat_size:
+                raise ValueError
+        given_digits.append(given_tup)
+        offset += 1
+    n_relations = int(lines[offset])
+    offset += 1
+    relations = []
+    for i in range(n_relations):
+        relation_row = lines[offset].split(' ')
+        relation_tup = (int(relation_row[0]), int(relation_row[1]),
+                        int(relation_row[2]), int(relation_row[3]))
+        for x in relation_tup:
+            if x < 1 or x > mat_size:
+                raise ValueError
+        relations.append(relation_tup)
+        offset += 1
+    return Futoshiki(mat_size, given_digits, relations)
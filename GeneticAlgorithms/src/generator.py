@@ -0,0 +1,160 @@
+# File: generator.py
+# Content: a generator of Futoshiki games with unique solutions, of any size
+# and difficulty, written in the input file format (see input_template.txt).
+
+
+from os import makedirs
+from os.path import join
+from random import Random
+from src.cancel import CancellationToken
+from src.game import Futoshiki
+from src.stats import Statistics
+from src.exact import Search, count_solutions
+
+
+# Search nodes a uniqueness check may visit (see generate()).
+MAX_NODES = 20000
+
+
+def latin_square(dim, rng):
+    """
+    This function creates a random Latin square (a legal board without
+    relations) by a randomized search.
+    :param dim: the dimension of the square.
+    :param rng: a random.Random object.
+    :return: a matrix of digits.
+    """
+    return Search(Futoshiki(dim, [], []), Statistics(), rng=rng).run()[0]
+
+
+def adjacent_relations(square):
+    """
+    This function lists the relations between all the adjacent cells of a
+    board, which the board satisfies.
+    :param square: a matrix of digits.
+    :return: a list of tuples (a, b, c, d) where the value of the a,b-cell is
+             greater than the value of the c,d-cell (0-based).
+    """
+    dim = len(square)
+    relations = []
+    for i in range(dim):
+        for j in range(dim):
+            for x, y in (i, j + 1), (i + 1, j):
+                if x < dim and y < dim:
+                    if square[i][j] > square[x][y]:
+                        relations.append((i, j, x, y))
+                    else:
+                        relations.append((x, y, i, j))
+    return relations
+
+
+def make_game(square, given, relations):
+    """
+    This function creates a game of the given clues of a board.
+    :param square: a matrix of digits.
+    :param given: a collection of cells (i, j) whose digits are given (0-based).
+    :param relations: a collection of relations (a, b, c, d) (0-based).
+    :return: a Futoshiki game object.
+    """
+    return Futoshiki(len(square),
+                     [(i + 1, j + 1, square[i][j]) for i, j in sorted(given)],
+                     [(a + 1, b + 1, c + 1, d + 1)
+                      for a, b, c, d in sorted(relations)])
+
+
+def generate(dim, givens, relations, rng, max_nodes=MAX_NODES):
+    """
+    This function generates a game with a unique solution. It draws a random
+    Latin square and random clues of it (given digits and relations between
+    adjacent cells). As long as the clues have another solution, a clue that
+    rules it out is added - a relation that the other solution breaks, or else
+    a given digit in which it differs. If the uniqueness check runs out of
+    search nodes, a random given digit is added (which makes the next check
+    easier).
+    :param dim: the dimension of the board.
+    :param givens: the number of given digits to draw (at least).
+    :param relations: the number of relations to draw (at least).
+    :param rng: a random.Random object.
+    :param max_nodes: search nodes each uniqueness check may visit.
+    :return: the game and its solution (a matrix of digits).
+    """
+    square = latin_square(dim, rng)
+    cells = [(i, j) for i in range(dim) for j in range(dim)]
+    candidates = adjacent_relations(square)
+    given = set(rng.sample(cells, min(givens, len(cells))))
+    related = set(rng.sample(candidates, min(relations, len(candidates))))
+    while True:
+        game = make_game(square, given, related)
+        token = CancellationToken(max_evaluations=max_nodes)
+        count, solutions = count_solutions(game, 2, token)
+        if token.reason:
+            given.add(rng.choice([c for c in cells if c not in given]))
+        elif count == 1:
+            return game, square
+        else:
+            other = solutions[0] if solutions[0] != square else solutions[1]
+            broken = [(a, b, c, d) for a, b, c, d in candidates
+                      if other[a][b] < other[c][d]]
+            if broken:
+                related.add(rng.choice(broken))
+            else:
+                given.add(rng.choice([(i, j) for i, j in cells
+                                      if other[i][j] != square[i][j]]))
+
+
+def game_lines(game):
+    """
+    This function writes a game in the input file format.
+    :param game: a Futoshiki game object.
+    :return: a list of lines (without line breaks).
+    """
+    lines = [str(game.dim), str(len(game.given))]
+    lines += [f'{i + 1} {j + 1} {v}' for (i, j), v in game.given.items()]
+    lines.append(str(len(game.relations)))
+    lines += [f'{a + 1} {b + 1} {c + 1} {d + 1}'
+              for a, b, c, d in game.relations]
+    return lines
+
+
+def write_game(path, game, square):
+    """
+    This function writes a game to an input file, and its solution to a
+    solution file next to it (named *_sol.txt, as in the bundled inputs).
+    :param path: a path to the game input file (ending with .txt).
+    :param game: a Futoshiki game object.
+    :param square: the game's solution (a matrix of digits).
+    :return: the path of the solution file.
+    """
+    solution_path = path[:-len('.txt')] + '_sol.txt'
+    with open(path, 'w') as file:
+        file.write('\n'.join(game_lines(game)))
+    with open(solution_path, 'w') as file:
+        file.write('\n'.join(' '.join(str(v) for v in row) for row in square))
+    return solution_path
+
+
+def generate_corpus(directory, count, dim, givens, relations, seed=0):
+    """
+    This function generates games into a directory. The k-th game is generated
+    from its own random stream, seeded by the seed, the dimension and k, so a
+    corpus is reproducible (and extending it keeps the existing games).
+    :param directory: a path to a directory (created if missing).
+    :param count: the number of games.
+    :param dim: the dimension of the boards.
+    :param givens: the fraction of the cells whose digits are given (at least).
+    :param relations: the fraction of the pairs of adjacent cells that have a
+           relation (at least).
+    :param seed: a seed.
+    :return: a list of the paths of the game input files.
+    """
+    makedirs(directory, exist_ok=True)
+    n_givens = round(givens * dim * dim)
+    n_relations = round(relations * 2 * dim * (dim - 1))
+    paths = []
+    for k in range(count):
+        game, square = generate(dim, n_givens, n_relations,
+                                Random(f'{seed}:{dim}:{k}'))
+        path = join(directory, f'{dim}_{k}.txt')
+        write_game(path, game, square)
+        paths.append(path)
+    return paths
@@ -1,8 +1,9 @@
 # File: optim.py
-# Content: an implementation of the optimization method.
+# Content: an implementation of the optimization method (for a single
+# solution, and vectorized for a whole population).
 
 
-from random import choice, randint
+import numpy as np
 from src.utils import Solution
 
 
@@ -15,108 +16,75 @@ def create_truth_matrix(game, solution):
     :return: the described matrix.
     """
 
-    # First, set the solution.
+    # First, set the solution. The board counts the digits of every row and
+    # column, so each cell is checked in O(1) (plus its relations).
     game.set(solution.vector)
-    truth_matrix = []
-
-    # Check constraints' satisfaction - for each constraint.
-    for x in range(game.dim):
-        row = []
-        for y in range(game.dim):
-            v = game.matrix[x][y]
-            not_satisfied = 0
-
-            # Check row-constraint.
-            for i in range(game.dim):
-                if i != x and game.matrix[i][y] == v:
-                    not_satisfied += 1
-                    break
-
-            # Check column-constraint.
-            for j in range(game.dim):
-                if j != y and game.matrix[x][j] == v:
-                    not_satisfied += 1
-                    break
-
-            # Check relation-constraint.
-            for a, b, c, d in game.relations:
-                if (x, y) == (a, b) and game.matrix[x][y] <= game.matrix[c][d]:
-                    not_satisfied += 1
-                    break
-
-            row.append(not_satisfied)
-        truth_matrix.append(row)
-    return truth_matrix
+    return [[game.board.penalty(x, y) for y in range(game.dim)]
+            for x in range(game.dim)]
 
 
 def find_unsatisfied_cells(game, solution):
     """
     This function finds all the cells in the game matrix that are not satisfied
-    by the given solution, using a "truth" matrix.
+    by the given solution. Only the free cells (game.cells) are checked, each
+    one in O(1) by the board's counts (plus its relations), so the game's given
+    numbers never have to be filtered out.
     :param game: a Futoshiki game object.
     :param solution: a Solution object.
     :return: a list of tuples (i, j, u) where i,j are the cell position and u is
              the number of unsatisfied constraints by the value in this cell.
     """
-    truth_matrix = create_truth_matrix(game, solution)
+    game.set(solution.vector)
+    penalty = game.board.penalty
     unsatisfied_cells = []
-
-    # Fill a list with unsatisfied cells by the truth_matrix.
-    for x in range(game.dim):
-        for y in range(game.dim):
-            if truth_matrix[x][y] > 0:
-                unsatisfied_cells.append((x, y, truth_matrix[x][y]))
-
-    # Filter out game's given numbers.
-    for i, j, u in unsatisfied_cells:
-        if (i, j) in game.given.keys():
-            unsatisfied_cells.remove((i, j, u))
-
+    for x, y in game.cells:
+        u = penalty(x, y)
+        if u > 0:
+            unsatisfied_cells.append((x, y, u))
     return unsatisfied_cells
 
 
 def find_optimizations(game, cells):
     """
-    This function finds a list of optimization options sorted by urgency.
+    This function finds a list of optimization options sorted by urgency. The
+    allowed values of a cell are kept in a bitmask (bit v is set if the value v
+    is allowed), which starts with the values that no other cell of its row and
+    column uses (see Board.free_digits()) and is narrowed by masks (including
+    the cell's domain, if the game has domains).
     :param game: a Futoshiki game object.
-    :param cells: a list of tuples (i,j,u) where the i,j-cell hit u constraints.
+    :param cells: a list of tuples (i,j,u) where the i,j-cell hit u constraints
+           (the game's board should hold the solution, see
+           find_unsatisfied_cells()).
     :return: a list of tuples (x, y, [O], t) where the x,y-cell can be optimized
              by setting a value in it from the list [O] and currently this cell
              is not satisfying u constraints.
     """
     optimizations = []
-    count = 0
-
-    # For 'limit' unsatisfied cells in urgency order...
+    matrix = game.matrix
+    values = range(1, game.dim + 1)
     for x, y, u in cells:
-        v = game.matrix[x][y]
-
-        # Initialize a list of allowed values.
-        allowed = [i + 1 for i in range(game.dim)]
-
-        # Remove from 'allowed' the values in the cell's row.
-        for i in range(game.dim):
-            if i != x and game.matrix[i][y] in allowed:
-                allowed.remove(game.matrix[i][y])
-
-        # Remove from 'allowed' the values in the cell's column.
-        for j in range(game.dim):
-            if j != y and game.matrix[x][j] in allowed:
-                allowed.remove(game.matrix[x][j])
-
-        # Remove from 'allowed' values according to relation constraints.
-        for a, b, c, d in game.relations:
-            u = game.matrix[c][d]
-            if (x, y) == (a, b) and v <= u:
-                for av in allowed:
-                    if av <= u:
-                        allowed.remove(av)
+        v = matrix[x][y]
+        allowed = game.board.free_digits(x, y)
+
+        # Keep only values that are greater than the cells that this cell
+        # should be greater than but is not.
+        for c, d in game.smaller[(x, y)]:
+            w = matrix[c][d]
+            if v <= w:
+                allowed &= -1 << (w + 1)
+
+        # Keep only values of the cell's domain, if the game has domains (see
+        # propagation.py).
+        if game.domains:
+            domain = 0
+            for w in game.domains[game.index[(x, y)]]:
+                domain |= 1 << w
+            allowed &= domain
 
         # If there are any allowed values left, add a tuple to the return list.
-        if len(allowed) > 0:
-            optimizations.append((x, y, allowed, u))
-            count += 1
-
+        if allowed:
+            optimizations.append((x, y, [i for i in values if allowed >> i & 1],
+                                  u))
     return optimizations
 
 
@@ -141,23 +109,86 @@ def optimize(game, solution):
 
     # Limit the number of optimizations, but handle the most urgent first.
     available_optimizations.sort(key=lambda tup: tup[3], reverse=True)
-    available_optimizations = available_optimizations[:randint(2, game.dim)]
+    limit = game.rng.randint(2, game.dim)
+    available_optimizations = available_optimizations[:limit]
 
     # Create and optimized vector for a Solution object
     array = solution.vector.copy()
     for x, y, allowed_values, _ in available_optimizations:
-        allowed = choice(allowed_values)
-        k = 0
-        broken = False
-        for i in range(game.dim):
-            if broken:
-                break
-            for j in range(game.dim):
-                if (i, j) not in game.given.keys():
-                    if (i, j) == (x, y):
-                        array[k] = allowed
-                        broken = True
-                        break
-                    k += 1
+        array[game.index[(x, y)]] = game.rng.choice(allowed_values)
 
     return Solution(game, array)
+
+
+def optimize_batch(game, genes, fitness, evaluate):
+    """
+    This function is a vectorized version of optimize() that optimizes a whole
+    population at once. The unsatisfied cells, their urgencies and their
+    allowed values are computed for all the individuals together from the
+    digits' counts in every row and column, the repairs are applied in bulk,
+    and the repaired individuals are evaluated in a single batched pass.
+    :param game: a Futoshiki game object.
+    :param genes: a (pop_size x solution_size) integer array of individuals.
+    :param fitness: an integer array of their fitness scores.
+    :param evaluate: a BatchEvaluator object (see batch.py).
+    :return: a (pop_size x solution_size) array of optimized individuals, and
+             an array of their fitness scores (individuals that could not be
+             optimized are left as they were).
+    """
+    n = game.dim
+    pop_size, size = genes.shape
+    rows, cols = evaluate.free // n, evaluate.free % n
+    values = genes.astype(np.intp) - 1
+
+    # Count each value in the cells' rows and columns (P x cells x values).
+    boards = evaluate.boards(genes)
+    row_counts, col_counts = evaluate.counts(boards)
+    in_row = row_counts[:, rows, :]
+    in_col = col_counts[:, cols, :]
+    own = values[..., np.newaxis] == np.arange(n)
+
+    # The truth matrix of the free cells - duplicates in the cell's column and
+    # row, and a relation in which the cell should be greater but is not. The
+    # values of a cell are allowed if no other cell of its row and column uses
+    # them, if they are greater than the cells it should be greater than, and
+    # if they are in the cell's domain.
+    index = values[..., np.newaxis]
+    urgency = (np.take_along_axis(in_col, index, 2)[..., 0] > 1).astype(np.int64)
+    urgency += np.take_along_axis(in_row, index, 2)[..., 0] > 1
+    allowed = (in_row - own == 0) & (in_col - own == 0)
+    flat = boards.reshape(pop_size, -1)
+    hit = np.zeros((pop_size, size), dtype=bool)
+    bound = np.zeros((pop_size, size), dtype=np.int8)
+    for a, b, c, d in game.relations:
+        k = game.index.get((a, b))
+        if k is None:
+            continue  # Given digits are never optimized.
+        w = flat[:, c * n + d]
+        unsatisfied = flat[:, a * n + b] <= w
+        hit[:, k] |= unsatisfied
+        bound[:, k] = np.where(unsatisfied, np.maximum(bound[:, k], w),
+                               bound[:, k])
+    urgency += hit
+    allowed &= np.arange(1, n + 1) > bound[..., np.newaxis]
+    if evaluate.domains is not None:
+        allowed &= evaluate.domains  # Digits that propagation eliminated.
+
+    # Choose between 2 and n of the optimizations of each individual, the most
+    # urgent first, and a random allowed value for each one of them.
+    options = (urgency > 0) & allowed.any(axis=2)
+    key = np.where(options, urgency, -1)
+    order = np.argsort(-key, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(size)[np.newaxis, :], axis=1)
+    limit = game.np_rng.integers(2, n + 1, pop_size)
+    chosen = options & (ranks < limit[:, np.newaxis])
+    picks = np.argmax(game.np_rng.random(allowed.shape) * allowed, axis=2) + 1
+
+    # Apply and evaluate the optimizations.
+    optimized = genes.copy()
+    optimized[chosen] = picks[chosen]
+    scores = np.array(fitness, dtype=np.int64)
+    changed = chosen.any(axis=1)
+    if changed.any():
+        scores[changed] = evaluate(optimized[changed])
+    return optimized, scores
@@ -0,0 +1,361 @@
+# File: parallel.py
+# Content: parallel solvers - an island-model Genetic Algorithm that runs
+# several populations and migrates solutions between them, and a portfolio
+# that races differently-configured solvers.
+
+
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+from multiprocessing import Event, Queue
+from queue import Empty
+from signal import signal, SIGINT, SIG_IGN
+from time import perf_counter, time
+from prettytable import PrettyTable
+from src.solver import genetic_solver
+from src.batch import batch_genetic_solver
+from src.stats import Statistics, HISTORY_SIZE
+from src.utils import Solution
+from src.cancel import CancellationToken
+from src.selection import ROULETTE, TOURNAMENT
+from src.permutation import CELLS, ROWS
+from src.seeding import new_seed, child_seeds
+
+
+# Migration topologies.
+RING = 'ring'
+FULL = 'full'
+
+
+# The default configurations of a portfolio.
+PORTFOLIO = [
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': None},
+    {'elitism': 0.05, 'crossover': 0.5, 'optim': None},
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': 'lamark'},
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': 'darwin'},
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': None, 'vectorized': True},
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': None,
+     'selection': TOURNAMENT},
+    {'elitism': 0.01, 'crossover': 0.8, 'optim': None, 'encoding': ROWS},
+]
+
+
+# Shared objects of the worker processes (set by the pool's initializer).
+_inboxes = []
+_stop = None
+
+
+def neighbours(index, n_islands, topology):
+    """
+    This function returns the islands that an island sends migrants to.
+    :param index: the index of the sending island.
+    :param n_islands: number of islands.
+    :param topology: RING (send to the next island) or FULL (send to all).
+    :return: a list of island indexes.
+    """
+    if topology == RING:
+        return [(index + 1) % n_islands] if n_islands > 1 else []
+    return [i for i in range(n_islands) if i != index]
+
+
+def _init_worker(inboxes, stop):
+    """
+    The initializer of the worker processes. Saves the shared objects (each
+    run seeds its own random streams, see seeding.py).
+    :param inboxes: a list with a migrants queue for each island.
+    :param stop: an event that is set once a worker solves the game.
+    :return: None.
+    """
+    global _inboxes, _stop
+    _inboxes = inboxes
+    _stop = stop
+    signal(SIGINT, SIG_IGN)  # ctrl+c is handled by the main process.
+    for inbox in inboxes:
+        inbox.cancel_join_thread()  # Never block the process' exit.
+
+
+def _run_island(index, game, topology, interval, migrants, generations,
+                pop_size, elitism, crossover, optim, max_evaluations=None,
+                cache_size=None, selection=ROULETTE, encoding=CELLS,
+                seed=None, history_size=HISTORY_SIZE, downsample=False):
+    """
+    Runs the genetic solver on a single island. Every 'interval' generations,
+    the island sends copies of its best 'migrants' solutions to its neighbours
+    and replaces its worst solutions by the migrants it received.
+    :return: a dictionary of the island's statistics.
+    """
+    targets = neighbours(index, len(_inboxes), topology)
+
+    def on_generation(g, population):
+        if g % interval == 0:
+            best = [s.vector.copy() for s in population[:migrants]]
+            for target in targets:
+                _inboxes[target].put(best)
+            immigrants = []
+            try:
+                while True:
+                    immigrants.extend(_inboxes[index].get_nowait())
+            except Empty:
+                pass
+            immigrants = immigrants[:len(population) // 2]
+            for k, vector in enumerate(immigrants):
+                population[-1 - k] = Solution(game, vector)
+        return False
+
+    stats = genetic_solver(game, generations, pop_size, elitism, crossover,
+                           optim, token=CancellationToken(event=_stop),
+                           max_evaluations=max_evaluations,
+                           cache_size=cache_size, selection=selection,
+                           encoding=encoding, verbose=False,
+                           on_generation=on_generation, seed=seed,
+                           history_size=history_size, downsample=downsample)
+    if stats.fitness == game.n_constraints:
+        _stop.set()
+    return {
+        'island': index,
+        'seed': stats.seed,
+        'solution': stats.solution,
+        'fitness': stats.fitness,
+        'generations': stats.generations,
+        'fitness_calls': stats.fitness_calls,
+        'mutate_calls': stats.mutate_calls,
+        'cross_over_calls': stats.cross_over_calls,
+        'restarts': stats.restarts,
+        'history': stats.history,
+        'restart_generations': stats.restart_generations,
+        'stop_reason': stats.stop_reason,
+        'cache_hits': stats.cache_hits,
+        'cache_misses': stats.cache_misses,
+    }
+
+
+def gather(futures, stop, token=None):
+    """
+    This function waits for the workers' results. Meanwhile, if the given token
+    is cancelled (or its time budget runs out), or once a worker fails, it
+    stops the other workers.
+    :param futures: a list of Future objects.
+    :param stop: the workers' stop event.
+    :param token: an optional CancellationToken.
+    :return: a list of the workers' results.
+    :raise: the exception of a failed worker.
+    """
+    pending = futures
+    while pending:
+        done, pending = wait(pending, timeout=0.1)
+        if any(f.exception() is not None for f in done):
+            stop.set()
+        if token and token.check():
+            stop.set()
+    return [f.result() for f in futures]
+
+
+def merge_stats(results):
+    """
+    This function merges the statistics of several islands into a single
+    Statistics object. The solution, the fitness history and the stop reason
+    are taken from the best island, and the counters are summed.
+    :param results: a list of dictionaries as returned by the workers.
+    :return: a Statistics object.
+    """
+    best = max(results, key=lambda r: r['fitness'])
+    stats = Statistics(best['history'].size, best['history'].downsample)
+    stats.solution = best['solution']
+    stats.fitness = best['fitness']
+    stats.history = best['history']
+    stats.restart_generations = best['restart_generations']
+    stats.stop_reason = best['stop_reason']
+    for r in results:
+        stats.generations += r['generations']
+        stats.fitness_calls += r['fitness_calls']
+        stats.mutate_calls += r['mutate_calls']
+        stats.cross_over_calls += r['cross_over_calls']
+        stats.restarts += r['restarts']
+        stats.cache_hits += r['cache_hits']
+        stats.cache_misses += r['cache_misses']
+    return stats
+
+
+def island_solver(game, generations, pop_size, elitism, crossover, optim=None,
+                  token=None, islands=4, topology=RING,
+                  interval=10, migrants=2, max_evaluations=None,
+                  cache_size=None, selection=ROULETTE, encoding=CELLS,
+                  seed=None, history_size=HISTORY_SIZE, downsample=False):
+    """
+    This function runs the Genetic Algorithm on several islands (populations)
+    in parallel processes. The islands periodically exchange their best
+    solutions through the migration topology, and all of them stop as soon as
+    one of them finds a legal solution.
+    :param game: a Futoshiki game object.
+    :param generations: number of generations parameter (per island).
+    :param pop_size: population size parameter (per island).
+    :param elitism: elitism parameter.
+    :param crossover: cross-over parameter (defines also the replication rate).
+    :param optim: a string that tells what optimization to use.
+    :param token: an optional CancellationToken that stops all the islands
+           (including once its time budget runs out).
+    :param islands: number of islands (and processes).
+    :param topology: RING or FULL.
+    :param interval: number of generations between migrations.
+    :param migrants: number of solutions each island sends in a migration.
+    :param max_evaluations: an optional budget of fitness calls, split evenly
+           between the islands.
+    :param cache_size: size of each island's fitness cache (see
+           solver.genetic_solver()).
+    :param selection: the selection method (see selection.py).
+    :param encoding: the encoding of solutions (see solver.genetic_solver()).
+    :param seed: the seed of the run. Each island runs on its own independent
+           random streams, derived from it (see seeding.py). A fresh seed is
+           drawn if not given. Note that migrations depend on the timing of the
+           processes, so only runs without migrations replay exactly.
+    :param history_size: the maximal number of generations in each island's
+           history (see solver.genetic_solver()).
+    :param downsample: see solver.genetic_solver().
+    :return: a merged Statistics object that contains the solution.
+    """
+    start = datetime.now()
+    seed = new_seed() if seed is None else seed
+    seeds = child_seeds(seed)
+    budget = max_evaluations // islands if max_evaluations else None
+    inboxes = [Queue() for _ in range(islands)]
+    stop = Event()
+    print(f'Running {islands} islands ({topology} topology)...')
+    with ProcessPoolExecutor(max_workers=islands, initializer=_init_worker,
+                             initargs=(inboxes, stop)) as pool:
+        futures = [pool.submit(_run_island, i, game, topology, interval,
+                               migrants, generations, pop_size, elitism,
+                               crossover, optim, budget, cache_size,
+                               selection, encoding, next(seeds),
+                               history_size, downsample)
+                   for i in range(islands)]
+        results = gather(futures, stop, token)
+
+    # Merge the results.
+    stats = merge_stats(results)
+    stats.seed = seed
+    if token and token.reason:
+        stats.stop_reason = token.reason
+    stats.runtime = str(datetime.now() - start).split(".")[0]
+    game.stats = stats
+    winner = max(results, key=lambda r: r['fitness'])['island']
+    print(f'Island {winner} found the best solution.')
+    return stats
+
+
+def describe(config):
+    """
+    This function describes a portfolio's configuration in a short string.
+    :param config: a dictionary of genetic solver parameters.
+    :return: a string.
+    """
+    return ', '.join(f'{k}={v}' for k, v in config.items())
+
+
+def _run_config(game, config, generations, pop_size, max_evaluations=None,
+                seed=None, history_size=HISTORY_SIZE, downsample=False):
+    """
+    Runs a solver with the given configuration in a portfolio. The run is
+    cancelled through its token (at the end of the current generation) once
+    another worker solves the game.
+    :return: a dictionary of the run's results.
+    """
+    start = perf_counter()
+    config = config.copy()
+    solver = genetic_solver
+    if config.pop('vectorized', False):
+        solver = batch_genetic_solver
+    params = {'generations': generations, 'pop_size': pop_size,
+              'elitism': 0.01, 'crossover': 0.8, 'optim': None}
+    params.update(config)
+    stats = solver(game, token=CancellationToken(event=_stop),
+                   max_evaluations=max_evaluations, verbose=False, seed=seed,
+                   history_size=history_size, downsample=downsample, **params)
+    solved = stats.fitness == game.n_constraints
+    if solved:
+        _stop.set()
+    return {
+        'seed': stats.seed,
+        'solution': stats.solution,
+        'fitness': stats.fitness,
+        'solved': solved,
+        'generations': stats.generations,
+        'fitness_calls': stats.fitness_calls,
+        'mutate_calls': stats.mutate_calls,
+        'cross_over_calls': stats.cross_over_calls,
+        'restarts': stats.restarts,
+        'history': stats.history,
+        'restart_generations': stats.restart_generations,
+        'stop_reason': stats.stop_reason,
+        'cache_hits': stats.cache_hits,
+        'cache_misses': stats.cache_misses,
+        'seconds': perf_counter() - start,
+        'finished': time(),
+    }
+
+
+def portfolio_solver(game, generations, pop_size, configs=None, token=None,
+                     workers=None, max_evaluations=None, seed=None,
+                     history_size=HISTORY_SIZE, downsample=False):
+    """
+    This function races several differently-configured solvers in parallel
+    processes. Once one of them finds a legal solution, the others are
+    cancelled, and a table that tells which configuration won and how long each
+    one ran is printed.
+    :param game: a Futoshiki game object.
+    :param generations: number of generations parameter (per run).
+    :param pop_size: population size parameter (per run).
+    :param configs: a list of dictionaries of genetic solver parameters
+           (elitism, crossover, optim, selection, encoding and vectorized).
+           PORTFOLIO by default.
+    :param token: an optional CancellationToken that stops all the runs
+           (including once its time budget runs out).
+    :param workers: number of processes (one per configuration by default).
+    :param max_evaluations: an optional budget of fitness calls for each
+           configuration.
+    :param seed: the seed of the race. Each configuration runs on its own
+           independent random streams, derived from it (see seeding.py). A
+           fresh seed is drawn if not given.
+    :param history_size: the maximal number of generations in each run's
+           history (see solver.genetic_solver()).
+    :param downsample: see solver.genetic_solver().
+    :return: the winner's Statistics object.
+    """
+    start = datetime.now()
+    seed = new_seed() if seed is None else seed
+    seeds = child_seeds(seed)
+    configs = configs or PORTFOLIO
+    stop = Event()
+    print(f'Racing {len(configs)} configurations...')
+    with ProcessPoolExecutor(max_workers=workers or len(configs),
+                             initializer=_init_worker,
+                             initargs=([], stop)) as pool:
+        futures = [pool.submit(_run_config, game, config, generations,
+                               pop_size, max_evaluations, next(seeds),
+                               history_size, downsample)
+                   for config in configs]
+        results = gather(futures, stop, token)
+
+    # Report. The winner is the first to solve the game, or the best one.
+    winner = max(range(len(results)), key=lambda k: (results[k]['fitness'],
+                                                     -results[k]['finished']))
+    table = PrettyTable(['Configuration', 'Status', 'Fitness', 'Generations',
+                         'Runtime (s)'])
+    table.align = 'l'
+    for k, (config, r) in enumerate(zip(configs, results)):
+        if k == winner:
+            status = 'winner'
+        elif r['solved']:
+            status = 'solved'
+        else:
+            status = r['stop_reason'] or 'finished'  # Its own stop reason.
+        table.add_row([describe(config), status, r['fitness'],
+                       r['generations'], f'{r["seconds"]:.2f}'])
+    print(table)
+
+    # Return the winner's statistics.
+    stats = merge_stats([results[winner]])
+    stats.seed = results[winner]['seed']  # Replays the winner on its own.
+    if token and token.reason:
+        stats.stop_reason = token.reason
+    stats.runtime = str(datetime.now() - start).split(".")[0]
+    game.stats = stats
+    return stats
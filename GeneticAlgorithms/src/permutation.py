@@ -0,0 +1,81 @@
+# File: permutation.py
+# Content: a row-permutation encoding of solutions - each row of the board is
+# a permutation of the digits that are missing in it, so row-constraints are
+# satisfied by construction and only columns and relations are searched.
+
+
+from src.utils import Solution, fitness, delta_fitness
+
+
+# Encodings.
+CELLS = 'cells'
+ROWS = 'rows'
+
+
+def missing_digits(game, i):
+    """
+    This function finds the digits that are not given in the i-th row.
+    :param game: a Futoshiki game object.
+    :param i: a row.
+    :return: a list of digits.
+    """
+    given = {game.given[(i, j)] for j in range(game.dim) if (i, j) in game.given}
+    return [v for v in range(1, game.dim + 1) if v not in given]
+
+
+def random_solution(game):
+    """
+    This function creates a random solution in which each row is a random
+    permutation of its missing digits. The vector has the same layout as in
+    the regular encoding (the free cells in row-major order).
+    :param game: a Futoshiki game object.
+    :return: a Solution object.
+    """
+    vector = [0] * game.solution_size
+    for i in range(game.dim):
+        digits = missing_digits(game, i)
+        game.rng.shuffle(digits)
+        for k, v in zip(game.row_index[i], digits):
+            vector[k] = v
+    return Solution(game, vector, fitness(game, vector))
+
+
+def cross_over(game, solution1, solution2):
+    """
+    This function implements a permutation-preserving Cross-Over - the newborn
+    takes the first rows of one parent and the other rows of the other parent.
+    :param game: a Futoshiki game object.
+    :param solution1: a vector - parent 1.
+    :param solution2: a vector - parent 2.
+    :return: a cross-overed solution - a newborn.
+    """
+    game.stats.cross_over_calls += 1
+    row = game.rng.randint(0, game.dim - 1)
+    sep = sum(len(r) for r in game.row_index[:row])  # The row's first index.
+    array = solution1[:sep] + solution2[sep:]
+    return Solution(game, array, fitness(game, array))
+
+
+def mutate(game, solution, parent_fitness=None):
+    """
+    This function implements the swap mutation - the values of two random free
+    cells in the same row are swapped, so the row stays a permutation.
+    :param game: a Futoshiki game object.
+    :param solution: a vector.
+    :param parent_fitness: the fitness of the given solution. If given, the
+           fitness of the mutant is calculated incrementally from it, by
+           checking only the columns and relations of the swapped cells.
+    :return: new mutated solution.
+    """
+    game.stats.mutate_calls += 1
+    array = solution.copy()
+    rows = [r for r in game.row_index if len(r) > 1]
+    if not rows:
+        return Solution(game, array, fitness(game, array))
+    i, j = game.rng.sample(game.rng.choice(rows), 2)
+    array[i], array[j] = array[j], array[i]
+    if parent_fitness is None:
+        return Solution(game, array, fitness(game, array))
+    score = delta_fitness(game, solution, parent_fitness, array, [i, j],
+                          rows=False)
+    return Solution(game, array, score)
@@ -0,0 +1,134 @@
+# File: propagation.py
+# Content: constraint propagation - narrows the possible digits of each cell
+# before solving, and fixes the cells that are left with a single digit.
+
+
+from datetime import datetime
+from src.game import Futoshiki
+from src.stats import Statistics
+from src.utils import cell_value, fitness
+
+
+def lines(game):
+    """
+    This function lists the rows and the columns of the game's board.
+    :param game: a Futoshiki game object.
+    :return: a list of lists of cells.
+    """
+    n = game.dim
+    rows = [[(i, j) for j in range(n)] for i in range(n)]
+    columns = [[(i, j) for i in range(n)] for j in range(n)]
+    return rows + columns
+
+
+def propagate(game):
+    """
+    This function computes the possible digits (domain) of every cell by arc
+    consistency, until nothing changes:
+    * A digit that is fixed in a cell is removed from the other cells of its
+      row and column, and a digit that fits only one cell of a row or a column
+      is fixed in that cell (all-different).
+    * The a,b-cell of a relation keeps only digits greater than the smallest
+      digit of the c,d-cell, and the c,d-cell only digits smaller than the
+      greatest digit of the a,b-cell (inequalities).
+    :param game: a Futoshiki game object.
+    :return: a dictionary from cells to sets of digits.
+    :raise: ValueError if the game has no solution.
+    """
+    digits = set(range(1, game.dim + 1))
+    domains = {(i, j): {game.given[(i, j)]} if (i, j) in game.given
+               else set(digits)
+               for i in range(game.dim) for j in range(game.dim)}
+    changed = True
+    while changed:
+        changed = False
+
+        # All-different constraints.
+        for line in lines(game):
+            for cell in line:
+                if len(domains[cell]) == 1:
+                    v = next(iter(domains[cell]))
+                    for other in line:
+                        if other != cell and v in domains[other]:
+                            domains[other].discard(v)
+                            changed = True
+            for v in digits:
+                places = [cell for cell in line if v in domains[cell]]
+                if not places:
+                    raise ValueError('The game has no solution.')
+                if len(places) == 1 and len(domains[places[0]]) > 1:
+                    domains[places[0]] = {v}
+                    changed = True
+
+        # Relation constraints.
+        for a, b, c, d in game.relations:
+            greater, smaller = domains[(a, b)], domains[(c, d)]
+            if not greater or not smaller:
+                raise ValueError('The game has no solution.')
+            low, high = min(smaller), max(greater)
+            if low >= min(greater) or high <= max(smaller):
+                domains[(a, b)] = {v for v in greater if v > low}
+                domains[(c, d)] = {v for v in smaller if v < high}
+                changed = True
+        if not all(domains.values()):
+            raise ValueError('The game has no solution.')
+    return domains
+
+
+def reduce_game(game):
+    """
+    This function creates a reduced copy of the game, in which the cells that
+    propagation fixed are given digits, and the domains of the other cells are
+    saved in the game's 'domains' attribute (by vector index), so solutions
+    are initialized and mutated with digits from the domains.
+    :param game: a Futoshiki game object.
+    :return: the reduced Futoshiki game object.
+    :raise: ValueError if the game has no solution.
+    """
+    domains = propagate(game)
+    given = [(i + 1, j + 1, next(iter(domain)))
+             for (i, j), domain in domains.items() if len(domain) == 1]
+    relations = [(a + 1, b + 1, c + 1, d + 1)
+                 for a, b, c, d in game.relations]
+    reduced = Futoshiki(game.dim, given, relations)
+    reduced.domains = [sorted(domains[cell]) for cell in reduced.cells]
+    return reduced
+
+
+def expand(game, reduced, solution):
+    """
+    This function converts a solution of the reduced game to a solution of the
+    original game.
+    :param game: the original Futoshiki game object.
+    :param reduced: the reduced Futoshiki game object.
+    :param solution: a vector of the reduced game.
+    :return: a vector of the original game.
+    """
+    return [cell_value(reduced, solution, i, j) for i, j in game.cells]
+
+
+def solve_reduced(solver, game, **params):
+    """
+    This function runs a solver on the game after constraint propagation. If
+    propagation fixes all the cells, the game is solved without running the
+    solver at all.
+    :param solver: a solver function, such as solver.genetic_solver().
+    :param game: a Futoshiki game object.
+    :param params: the solver's other parameters.
+    :return: a Statistics object that contains the solution of the game.
+    :raise: ValueError if the game has no solution.
+    """
+    start = datetime.now()
+    reduced = reduce_game(game)
+    if reduced.solution_size > 0:
+        stats = solver(reduced, **params)
+    else:
+        stats = Statistics()
+        stats.solution = []
+        stats.runtime = str(datetime.now() - start).split(".")[0]
+    stats.forced = len(reduced.given) - len(game.given)
+    stats.solution = expand(game, reduced, stats.solution)
+    game.stats = stats
+    if reduced.solution_size == 0:
+        stats.fitness = fitness(game, stats.solution)
+    return stats
@@ -0,0 +1,143 @@
+# File: restart.py
+# Content: diversity management - a cheap estimate of the population's
+# diversity, an adaptive acceptance rate of worse mutants and a restart policy
+# with partial restarts on a Luby schedule.
+
+
+import numpy as np
+
+
+def luby(i):
+    """
+    Returns the i-th element of the Luby sequence: 1, 1, 2, 1, 1, 2, 4, 1, 1, 2,
+    1, 1, 2, 4, 8, ... (a restart schedule that is within a logarithmic factor
+    of the best fixed schedule, without knowing it in advance).
+    :param i: a positive index.
+    :return: a power of 2.
+    """
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+def diversity(genes, samples, rng):
+    """
+    Estimates the diversity of a population - the average Hamming distance
+    between two of its individuals (as a fraction of the vector's length), over
+    random pairs of distinct individuals.
+    :param genes: a 2-D array of vectors, or a list of vectors.
+    :param samples: number of pairs.
+    :param rng: a numpy.random.Generator object.
+    :return: a number between 0 (all the sampled pairs are identical) and 1.
+    """
+    n = len(genes)
+    if n < 2:
+        return 0.0
+    i = rng.integers(0, n, samples)
+    j = (i + rng.integers(1, n, samples)) % n  # Any other individual.
+    if isinstance(genes, np.ndarray):
+        first, second = genes[i], genes[j]
+    else:
+        first = np.array([genes[k] for k in i])
+        second = np.array([genes[k] for k in j])
+    return float((first != second).mean())
+
+
+class RestartPolicy:
+    """
+    An instance of this class decides when a run restarts and how much of the
+    population is kept, and adapts the acceptance rate to the diversity:
+    * Every non-elite is mutated, and a mutant always replaces its origin if it
+      is better. The acceptance rate is the probability that a mutant that is
+      not better replaces it anyway. It grows while the diversity is below a
+      threshold, and decays back once it is restored.
+    * A restart happens once the population has converged (all the individuals
+      have the same fitness), or once its best fitness has not improved for
+      base * luby(k) generations, before the k-th restart.
+    * A restart is partial - the best individuals are kept, and only the rest
+      of the population is replaced by random individuals.
+    Unlike the solvers before this policy, which only replaced the whole
+    population once it converged, the default policy also restarts stagnant
+    runs. RestartPolicy(keep=0, base=None, max_acceptance=0) behaves like them.
+    """
+
+    def __init__(self, keep=0.1, base=50, threshold=0.1, step=0.05,
+                 min_acceptance=0.0, max_acceptance=0.5, samples=32):
+        """
+        Constructor.
+        :param keep: the fraction of the population that a restart keeps (at
+               least one individual, unless it is 0).
+        :param base: generations without improvement before a restart, which
+               are multiplied by the Luby sequence (None restarts only
+               converged populations).
+        :param threshold: the diversity below which the acceptance rate grows.
+        :param step: the change of the acceptance rate per generation.
+        :param min_acceptance: the minimal (and initial) acceptance rate.
+        :param max_acceptance: the maximal acceptance rate.
+        :param samples: number of pairs that estimate the diversity.
+        """
+        self.keep = keep
+        self.base = base
+        self.threshold = threshold
+        self.step = step
+        self.min_acceptance = min_acceptance
+        self.max_acceptance = max_acceptance
+        self.samples = samples
+        self.restarts = 0
+        self.best = None
+        self.stagnant = 0
+        self.acceptance_rate = min_acceptance
+
+    def start(self):
+        """
+        This method resets the policy's state. Solvers call it when they start.
+        :return: None.
+        """
+        self.restarts = 0
+        self.best = None
+        self.stagnant = 0
+        self.acceptance_rate = self.min_acceptance
+
+    def n_keep(self, pop_size):
+        """
+        :param pop_size: population size.
+        :return: the number of the best individuals that a restart keeps.
+        """
+        if not self.keep:
+            return 0
+        return max(1, int(self.keep * pop_size))
+
+    def update(self, maximum, minimum, value):
+        """
+        This method updates the policy with a generation's information.
+        :param maximum: fitness of the best solution in the generation.
+        :param minimum: fitness of the worst solution in the generation.
+        :param value: the diversity of the generation (see diversity()).
+        :return: True if the population should restart, False otherwise.
+        """
+        if self.best is None or maximum > self.best:
+            self.best = maximum
+            self.stagnant = 0
+        else:
+            self.stagnant += 1
+        if value < self.threshold:
+            self.acceptance_rate = min(self.max_acceptance,
+                                       self.acceptance_rate + self.step)
+        else:
+            self.acceptance_rate = max(self.min_acceptance,
+                                       self.acceptance_rate - self.step)
+        stagnated = self.base is not None and \
+            self.stagnant >= self.base * luby(self.restarts + 1)
+        if maximum == minimum or stagnated:
+            self.restarts += 1
+            self.best = None
+            self.stagnant = 0
+            self.acceptance_rate = self.min_acceptance
+            return True
+        return False
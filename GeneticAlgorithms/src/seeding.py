@@ -0,0 +1,58 @@
+# File: seeding.py
+# Content: the random streams of a run - derived from a single seed, so a run
+# can be replayed, and split into independent streams for parallel workers.
+
+
+from random import Random, SystemRandom
+import numpy as np
+
+
+def new_seed():
+    """
+    Draws a fresh seed from the operating system's entropy.
+    :return: a non-negative integer.
+    """
+    return SystemRandom().getrandbits(63)
+
+
+def streams(seed):
+    """
+    Creates the random streams of a run. The list-based code draws scalars
+    from a random.Random object (which is fast for single draws), and the
+    array-based code draws arrays from a NumPy Generator.
+    :param seed: a non-negative integer.
+    :return: a random.Random object and a numpy.random.Generator object.
+    """
+    sequence = np.random.SeedSequence(seed)
+    state = sequence.generate_state(2, np.uint64)
+    return Random(int(state[0]) << 64 | int(state[1])), \
+        np.random.default_rng(sequence)
+
+
+def child_seeds(seed):
+    """
+    Yields seeds of independent streams (e.g., one per worker, island or game),
+    derived from a seed. The k-th seed depends only on the seed and k.
+    :param seed: a non-negative integer.
+    :return: a generator of non-negative integers.
+    """
+    sequence = np.random.SeedSequence(seed)
+    while True:
+        child = sequence.spawn(1)[0]
+        yield int(child.generate_state(1, np.uint64)[0]) >> 1
+
+
+def seed_game(game, seed=None):
+    """
+    Sets the random streams of a game's run (see streams()), which the genetic
+    operators use, and records the seed in the game's statistics.
+    :param game: a Futoshiki game object.
+    :param seed: a non-negative integer (a fresh seed if None).
+    :return: the seed.
+    """
+    if seed is None:
+        seed = new_seed()
+    game.rng, game.np_rng = streams(seed)
+    if game.stats is not None:
+        game.stats.seed = seed
+    return seed
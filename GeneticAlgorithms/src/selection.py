@@ -0,0 +1,147 @@
+# File: selection.py
+# Content: selection methods - fitness-proportional selection (roulette wheel
+# and stochastic universal sampling), tournament selection and rank selection.
+
+
+import numpy as np
+
+
+# Selection methods.
+ROULETTE = 'roulette'
+SUS = 'sus'
+TOURNAMENT = 'tournament'
+RANK = 'rank'
+METHODS = (ROULETTE, SUS, TOURNAMENT, RANK)
+
+
+def ranks(fitness):
+    """
+    Ranks the individuals by their fitness, from 1 (the worst) to n (the best).
+    :param fitness: an array of fitness scores.
+    :return: an array of ranks.
+    """
+    order = np.argsort(fitness, kind='stable')
+    result = np.empty(len(fitness), dtype=np.float64)
+    result[order] = np.arange(1, len(fitness) + 1)
+    return result
+
+
+def weights(fitness, method, tournament_size=2):
+    """
+    Calculates the selection weights of the individuals, i.e., numbers that are
+    proportional to the probability to select each one of them in a single
+    pick, according to the selection method.
+    :param fitness: an array of fitness scores.
+    :param method: one of METHODS.
+    :param tournament_size: number of contenders in a tournament.
+    :return: an array of non-negative weights.
+    """
+    if method == RANK:
+        w = ranks(fitness)
+    elif method == TOURNAMENT:
+
+        # The best of t random contenders has rank r with probability
+        # proportional to r^t - (r-1)^t.
+        r = ranks(fitness)
+        w = r ** tournament_size - (r - 1) ** tournament_size
+    else:
+        w = np.maximum(np.asarray(fitness, dtype=np.float64), 0)
+    if not w.any():
+        w = np.ones(len(w))  # No preferences - select uniformly.
+    return w
+
+
+def roulette(w, size, rng):
+    """
+    Roulette wheel selection - each pick is a binary search of a random point
+    in the cumulative sums of the weights.
+    :param w: an array of weights.
+    :param size: number (or shape) of indexes to select.
+    :param rng: a numpy.random.Generator object.
+    :return: an array of selected indexes.
+    """
+    cumulative = np.cumsum(w)
+    points = rng.random(size) * cumulative[-1]
+    return np.searchsorted(cumulative, points, side='right')
+
+
+def sus(w, size, rng):
+    """
+    Stochastic universal sampling - the picks are evenly spaced points on the
+    wheel, with a single random offset, so every individual is selected a
+    number of times that is close to its expected number. The picks are
+    shuffled, so they can be paired as parents.
+    :param w: an array of weights.
+    :param size: number (or shape) of indexes to select.
+    :param rng: a numpy.random.Generator object.
+    :return: an array of selected indexes.
+    """
+    n = int(np.prod(size))
+    cumulative = np.cumsum(w)
+    step = cumulative[-1] / n
+    points = (rng.random() + np.arange(n)) * step
+    picks = np.searchsorted(cumulative, points, side='right')
+    rng.shuffle(picks)
+    return picks.reshape(size)
+
+
+def tournament(fitness, size, rng, tournament_size=2):
+    """
+    Tournament selection - each pick is the best of a few random contenders.
+    :param fitness: an array of fitness scores.
+    :param size: number (or shape) of indexes to select.
+    :param rng: a numpy.random.Generator object.
+    :param tournament_size: number of contenders in a tournament.
+    :return: an array of selected indexes.
+    """
+    shape = tuple(np.atleast_1d(size)) + (tournament_size,)
+    contenders = rng.integers(0, len(fitness), shape)
+    best = np.argmax(np.asarray(fitness)[contenders], axis=-1)
+    return np.take_along_axis(contenders, best[..., np.newaxis], -1)[..., 0]
+
+
+def distinct(w, size, rng):
+    """
+    Selects distinct indexes, where each pick is made among the individuals
+    that were not picked yet with probabilities proportional to their weights
+    (Efraimidis-Spirakis' weighted sampling without replacement).
+    :param w: an array of weights.
+    :param size: number of indexes to select.
+    :param rng: a numpy.random.Generator object.
+    :return: an array of selected indexes.
+    """
+    if size >= len(w):
+        return rng.permutation(len(w))
+    with np.errstate(divide='ignore'):
+        keys = np.log(rng.random(len(w))) / w  # -inf for zero weights.
+    return np.argpartition(-keys, size - 1)[:size]
+
+
+def select(fitness, size, method=ROULETTE, replace=True, tournament_size=2,
+           rng=None):
+    """
+    Selects individuals according to their fitness. With replacement, this
+    takes O(n + k log n) time for n individuals and k picks, and without it
+    O(n) time.
+    :param fitness: a sequence of fitness scores.
+    :param size: number (or shape) of indexes to select.
+    :param method: one of METHODS.
+    :param replace: whether an index can be selected more than once (if False,
+           size must be a number).
+    :param tournament_size: number of contenders in a tournament.
+    :param rng: a numpy.random.Generator object (a fresh one if None).
+    :return: an array of selected indexes.
+    """
+    rng = rng or np.random.default_rng()
+    fitness = np.asarray(fitness)
+    if np.prod(size) == 0:
+        return np.zeros(size, dtype=np.intp)
+    if not replace:
+        return distinct(weights(fitness, method, tournament_size), size,
+                        rng)
+    if method == TOURNAMENT:
+        return tournament(fitness, size, rng, tournament_size)
+    w = weights(fitness, method)
+    if method == SUS:
+        return sus(w, size, rng)
+    return roulette(w, size, rng)
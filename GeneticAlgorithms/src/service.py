@@ -0,0 +1,268 @@
+# File: service.py
+# Content: a batch solving service - solves many game input files in parallel
+# processes and writes a result record per game as soon as it is solved.
+
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from glob import iglob
+from json import dumps
+from multiprocessing import Event
+from os import cpu_count, scandir
+from os.path import isdir
+from signal import signal, SIGINT, SIG_IGN
+from sys import stdin
+from time import perf_counter
+from src.game import parse_game
+from src.solver import genetic_solver
+from src.batch import batch_genetic_solver
+from src.cancel import CancellationToken
+from src.selection import METHODS, ROULETTE
+from src.permutation import CELLS, ROWS
+from src.propagation import solve_reduced
+from src.exact import exact_solver
+from src.stats import HISTORY_SIZE
+from src.seeding import new_seed, child_seeds
+
+
+# The shared stop event of the worker processes (set by the pool's initializer).
+_stop = None
+
+
+def find_puzzles(sources):
+    """
+    This function lazily lists the game input files of the given sources, so
+    thousands of files never have to be held in memory at once.
+    :param sources: a list of directories (all the .txt files in them, except
+           for solution files named *_sol.txt), glob patterns, file paths, or
+           '-' for a stream of paths (one per line) read from the standard
+           input.
+    :return: a generator of file paths.
+    """
+    for source in sources:
+        if source == '-':
+            for line in stdin:
+                if line.strip():
+                    yield line.strip()
+        elif isdir(source):
+            with scandir(source) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith('.txt') \
+                            and not entry.name.endswith('_sol.txt'):
+                        yield entry.path
+        else:
+            yield from iglob(source)
+
+
+def _init_worker(stop):
+    """
+    The initializer of the worker processes.
+    :param stop: an event that is set once the service is cancelled.
+    :return: None.
+    """
+    global _stop
+    _stop = stop
+    signal(SIGINT, SIG_IGN)  # ctrl+c is handled by the main process.
+
+
+def _solve_file(path, params, seed):
+    """
+    Solves a single game input file.
+    :param path: a path to a game input file.
+    :param params: a dictionary of genetic solver parameters (and 'vectorized',
+           'propagate' and 'exact').
+    :param seed: the seed of the genetic solver's random streams.
+    :return: a result record (a dictionary). Any error is reported in the
+             record's 'error' field instead of being raised.
+    """
+    start = perf_counter()
+    record = {'puzzle': path, 'seed': seed}
+    try:
+        with open(path, 'r') as file:
+            game = parse_game(file.readlines())
+    except Exception:
+        record['error'] = 'Invalid input file.'
+        return record
+    params = params.copy()
+    solver = genetic_solver
+    params['seed'] = seed
+    if params.pop('vectorized', False):
+        solver = batch_genetic_solver
+    if params.pop('exact', False):
+        solver = exact_solver
+        params = {k: params.get(k) for k in ('propagate', 'time_budget',
+                                             'max_evaluations')}
+    params.update(token=CancellationToken(event=_stop), verbose=False)
+    try:
+        if params.pop('propagate', False):
+            stats = solve_reduced(solver, game, **params)
+        else:
+            stats = solver(game, **params)
+    except Exception as e:
+        record['error'] = str(e) or type(e).__name__
+        return record
+    record.update({
+        'solution': stats.solution,
+        'correct': game.validate(stats.solution),
+        'fitness': stats.fitness,
+        'n_constraints': game.n_constraints,
+        'generations': stats.generations,
+        'fitness_calls': stats.fitness_calls,
+        'nodes': stats.nodes,
+        'forced': stats.forced,
+        'stop_reason': stats.stop_reason,
+        'runtime': round(perf_counter() - start, 3),
+    })
+    return record
+
+
+def solve_all(sources, output, workers=None, token=None, seed=None,
+              **params):
+    """
+    This function solves all the games of the given sources in parallel
+    processes and writes a JSON line per game to the output file as soon as the
+    game is solved (in the order of completion). Only a bounded number of games
+    is scheduled at any time, so memory does not grow with the number of games.
+    :param sources: see find_puzzles().
+    :param output: a path to the results file.
+    :param workers: number of processes (the number of CPUs by default).
+    :param token: an optional CancellationToken that stops the service. The
+           running games return their best solutions so far.
+    :param seed: the seed of the service. The k-th game runs on independent
+           random streams derived from it (see seeding.py), so rerunning the
+           same games with the same seed replays them, whatever the order of
+           completion. A fresh seed is drawn if not given.
+    :param params: genetic solver parameters, as accepted by genetic_solver()
+           (and 'vectorized', 'propagate' and 'exact'), applied to every game.
+    :return: a dictionary with aggregate results and throughput.
+    """
+    workers = workers or cpu_count() or 1
+    puzzles = find_puzzles(sources)
+    seed = new_seed() if seed is None else seed
+    seeds = child_seeds(seed)
+    pending = set()
+    scheduled = {}  # The path and seed of each scheduled game.
+    summary = {'puzzles': 0, 'correct': 0, 'errors': 0, 'fitness_calls': 0,
+               'seed': seed}
+    start = perf_counter()
+    stop = Event()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(stop,)) as pool, \
+            open(output, 'w') as results:
+        while True:
+
+            # Keep the pool busy, with a small backlog of scheduled games.
+            while len(pending) < 2 * workers and not stop.is_set():
+                path = next(puzzles, None)
+                if path is None:
+                    break
+                game_seed = next(seeds)
+                future = pool.submit(_solve_file, path, params, game_seed)
+                scheduled[future] = path, game_seed
+                pending.add(future)
+            if not pending:
+                break
+
+            # Write the records of the games that are done.
+            done, pending = wait(pending, timeout=0.1,
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    record = future.result()
+                except Exception as e:
+                    path, game_seed = scheduled[future]
+                    record = {'puzzle': path, 'seed': game_seed,
+                              'error': str(e) or type(e).__name__}
+                del scheduled[future]
+                results.write(dumps(record) + '\n')
+                results.flush()
+                summary['puzzles'] += 1
+                if 'error' in record:
+                    summary['errors'] += 1
+                    continue
+                summary['correct'] += record['correct']
+                summary['fitness_calls'] += record['fitness_calls']
+            if token and token.check():
+                stop.set()
+
+    seconds = perf_counter() - start
+    summary['seconds'] = round(seconds, 3)
+    summary['throughput'] = round(summary['puzzles'] / seconds, 3)
+    return summary
+
+
+def main(args=None):
+    parser = ArgumentParser(description='Solve many Futoshiki games in '
+                                        'parallel and write a JSON line of '
+                                        'results per game.')
+    parser.add_argument('sources', nargs='+',
+                        help='directories, glob patterns or files of games '
+                             '(\'-\' reads paths from the standard input)')
+    parser.add_argument('-o', '--output', default='results.jsonl',
+                        help='the results file')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='number of processes')
+    parser.add_argument('-g', '--generations', type=int, default=5000)
+    parser.add_argument('-p', '--population', type=int, default=100)
+    parser.add_argument('-e', '--elitism', type=float, default=0.01)
+    parser.add_argument('-c', '--crossover', type=float, default=0.8)
+    parser.add_argument('--optim', choices=['lamark', 'darwin'], default=None)
+    parser.add_argument('--selection', choices=METHODS, default=ROULETTE)
+    parser.add_argument('--encoding', choices=[CELLS, ROWS], default=CELLS)
+    parser.add_argument('--vectorized', action='store_true')
+    parser.add_argument('--propagate', action='store_true',
+                        help='narrow the digits of the cells by constraint '
+                             'propagation before solving')
+    parser.add_argument('--exact', action='store_true',
+                        help='solve by exact backtracking search instead of '
+                             'the genetic algorithm')
+    parser.add_argument('--budget', type=float, default=None,
+                        help='time budget per game in seconds')
+    parser.add_argument('--evaluations', type=int, default=None,
+                        help='fitness calls budget per game')
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help='a seed that makes the results reproducible')
+    parser.add_argument('--history-size', type=int, default=HISTORY_SIZE,
+                        help='the maximal number of generations recorded in '
+                             'the fitness history of each game')
+    parser.add_argument('--downsample', action='store_true',
+                        help='keep every other generation of the whole run '
+                             'once the history is full, instead of the most '
+                             'recent ones')
+    args = parser.parse_args(args)
+
+    # Reject unsupported combinations once, as the CLI does, instead of
+    # reporting every game as invalid.
+    if args.encoding == ROWS and (args.optim or args.vectorized):
+        parser.error('the rows encoding does not support optimization or the '
+                     'vectorized solver')
+    if args.exact and args.vectorized:
+        parser.error('the exact solver does not support the vectorized '
+                     'solver')
+    if args.history_size < 1:
+        parser.error('the history size should be a positive integer')
+
+    token = CancellationToken()
+    with token.handle_signals():
+        summary = solve_all(args.sources, args.output, args.workers, token,
+                            args.seed,
+                            generations=args.generations,
+                            pop_size=args.population,
+                            elitism=args.elitism,
+                            crossover=args.crossover,
+                            optim=args.optim,
+                            selection=args.selection,
+                            encoding=args.encoding,
+                            vectorized=args.vectorized,
+                            propagate=args.propagate,
+                            exact=args.exact,
+                            time_budget=args.budget,
+                            max_evaluations=args.evaluations,
+                            history_size=args.history_size,
+                            downsample=args.downsample)
+    print(f'Solved {summary["correct"]} of {summary["puzzles"]} games '
+          f'({summary["errors"]} invalid) in {summary["seconds"]}s | '
+          f'{summary["throughput"]} games/s | '
+          f'{summary["fitness_calls"]} fitness calls | '
+          f'seed {summary["seed"]}.')
+    print(f'Results were written to {args.output}.')
@@ -2,16 +2,27 @@
 # Content: an implementation of a Genetic Algorithm that solve Futoshiki games.
 
 
-from random import choice
+import numpy as np
 from datetime import datetime
-from keyboard import is_pressed
 from src.utils import *
-from src.optim import optimize
-from src.stats import Statistics
+from src.optim import optimize_batch
+from src.batch import BatchEvaluator
+from src.stats import Statistics, HISTORY_SIZE
+from src.cancel import CancellationToken
+from src.cache import FitnessCache
+from src.selection import select, ROULETTE
+from src.restart import RestartPolicy, diversity
+from src.seeding import seed_game
+from src import permutation
+from src.permutation import CELLS, ROWS
 
 
 def genetic_solver(game, generations, pop_size, elitism, crossover, optim=None,
-                   to_plot=False):
+                   delta=True, token=None, time_budget=None,
+                   max_evaluations=None, progress=None, cache_size=None,
+                   selection=ROULETTE, encoding=CELLS, verbose=True,
+                   on_generation=None, restart=None, seed=None,
+                   history_size=HISTORY_SIZE, downsample=False):
     """
     This function is the Genetic Algorithm implementation.
     :param game: a Futoshiki game object.
@@ -20,118 +31,179 @@ def genetic_solver(game, generations, pop_size, elitism, crossover, optim=None,
     :param elitism: elitism parameter.
     :param crossover: cross-over parameter (defines also the replication rate).
     :param optim: a string that tells what optimization to use.
-    :param to_plot: a boolean that tells if to create a plot or not.
+    :param delta: a boolean that tells if to evaluate mutants incrementally.
+    :param token: an optional CancellationToken that is checked every
+           generation. Once it is cancelled (or its budget runs out) the run
+           stops and the best solution found so far is returned.
+    :param time_budget: seconds the run may take. Once they pass, the best
+           solution found so far is returned (checked every generation).
+    :param max_evaluations: fitness calls the run may perform. Once they are
+           used, the best solution found so far is returned (checked every
+           generation, so the last generation may exceed it a bit).
+    :param progress: an optional function f(g, stats) that is called whenever
+           a better solution is found, with the generation number and the
+           Statistics object, which holds the best solution so far.
+    :param cache_size: if given, the fitness scores of up to this number of
+           recently evaluated vectors are cached, and re-evaluating a cached
+           vector does not count as a fitness call.
+    :param selection: the selection method of parents and survivors (see
+           selection.py).
+    :param encoding: CELLS (any cell may take any value) or ROWS (each row is
+           a permutation of its missing digits, see permutation.py).
+    :param verbose: a boolean that tells if to print progress.
+    :param on_generation: an optional function f(g, population) that is called
+           every generation with the sorted population. It may replace
+           individuals in the population, and returning True stops the run.
+    :param restart: a RestartPolicy object that decides when the population
+           restarts, how much of it is kept, and the acceptance rate of the
+           mutants that are not better (see restart.py). A default policy is
+           used if not given.
+    :param seed: the seed of the run's random streams (see seeding.py). Runs
+           with the same seed and parameters are identical (unless they are
+           stopped by time). A fresh seed is drawn if not given, and the seed
+           is recorded in the statistics either way.
+    :param history_size: the maximal number of generations recorded in the
+           statistics' history (see stats.History).
+    :param downsample: a boolean that tells how a full history keeps recording
+           - by keeping every other generation of the whole run (True), or by
+           overwriting the oldest generations (False).
     :return: a Statistics object that contains the solution.
     """
+    if encoding == ROWS and optim is not None:
+        raise ValueError('The row-permutation encoding does not support '
+                         'optimization.')
 
     # Timer & Statistics.
     start = datetime.now()
-    stats_backup = game.stats
-    game.stats = Statistics()
+    game.stats = Statistics(history_size, downsample)
+    seed_game(game, seed)
+    token = CancellationToken.run(token, time_budget, max_evaluations)
+    game.cache = FitnessCache(cache_size) if cache_size else None
+    restart = restart or RestartPolicy()
+    restart.start()
 
     # Composition of the new population.
     n_elite = int(elitism * pop_size)
     n_newborns = int(crossover * pop_size)
     n_survivors = pop_size - n_elite - n_newborns
 
+    # Genetic operators of the encoding.
+    new_solution, cross, mutation = Solution, cross_over, mutate
+    if encoding == ROWS:
+        new_solution = permutation.random_solution
+        cross, mutation = permutation.cross_over, permutation.mutate
+
     # Population.
-    population = [Solution(game) for i in range(pop_size)]
+    population = [new_solution(game) for i in range(pop_size)]
+    evaluate = BatchEvaluator(game) if optim else None
 
     # Evolution.
     best_solution = ''
     best_fitness = 0
     for g in range(1, generations + 1):
 
-        # Allow the user to stop the calculations.
-        if is_pressed('ctrl+0'):
-            game.stats = stats_backup
-            return None
-
         # Gather information.
         game.stats.generations += 1
         maximum, minimum, average = gather_info(population)
-        game.stats.min_fitness.append(minimum)
-        game.stats.max_fitness.append(maximum)
-        game.stats.avg_fitness.append(average)
+        value = diversity([s.vector for s in population], restart.samples,
+                          game.np_rng)
+        game.stats.history.append(g, minimum, maximum, average, value)
 
         # Print information.
-        if g % 10 == 0:
-            average_str = str(average)
-            if len(average_str.split('.')[1]) == 1:
-                average_str += '0'
-            print(f'Generation {g}:  '
-                  f'Worst fit: {minimum}  |  '
-                  f'Average fit: {average_str}  |  '
-                  f'Best fit: {maximum}  |  '
-                  f'Optimal fit: {best_fitness}  |  '
-                  f'Fitness calls: {game.stats.fitness_calls}')
-
-        # Optimization.
+        if verbose and g % 10 == 0:
+            print_generation(g, minimum, average, maximum, best_fitness,
+                             game.stats.fitness_calls)
+
+        # Optimization - the individuals are optimized all at once (see
+        # optim.optimize_batch()).
         if optim == 'lamark':
             indexes = list(range(pop_size))
-            shuffle(indexes)
+            game.rng.shuffle(indexes)
             indexes = indexes[:int(0.8 * pop_size)]
-            for i in indexes:
-                population[i] = optimize(game, population[i])
+            genes = np.array([population[i].vector for i in indexes],
+                             dtype=np.int8)
+            scores = [population[i].fitness for i in indexes]
+            genes, scores = optimize_batch(game, genes, scores, evaluate)
+            for i, vector, score in zip(indexes, genes.tolist(),
+                                        scores.tolist()):
+                population[i] = Solution(game, vector, score)
         elif optim == 'darwin':
-            darwin_population = [optimize(game, s) for s in population]
-            darwin = max(darwin_population, key=lambda s: s.fitness)
-            if best_fitness < darwin.fitness:
-                best_solution = darwin.vector.copy()
-                best_fitness = darwin.fitness
-                if to_plot:
-                    game.stats.save_plot()
+            genes = np.array([s.vector for s in population], dtype=np.int8)
+            scores = [s.fitness for s in population]
+            genes, scores = optimize_batch(game, genes, scores, evaluate)
+            k = int(np.argmax(scores))
+            if best_fitness < scores[k]:
+                best_solution = genes[k].tolist()
+                best_fitness = int(scores[k])
 
         # Sort solutions and mark the best one.
         population.sort(key=lambda s: s.fitness, reverse=True)
         if best_fitness < population[0].fitness:
             best_solution = population[0].vector.copy()
             best_fitness = population[0].fitness
-            if to_plot:
-                game.stats.save_plot()
+
+        # Keep the best solution so far available (anytime) and report it.
+        if game.stats.fitness < best_fitness:
+            game.stats.solution = best_solution
+            game.stats.fitness = best_fitness
+            if progress:
+                progress(g, game.stats)
 
         # Stopping condition.
         if best_fitness == game.n_constraints:
-            print(f'Generation {g}:  A legal solution has been found!')
+            if verbose:
+                print(f'Generation {g}:  A legal solution has been found!')
             break
 
-        # Early convergence handling.
-        if maximum == minimum:
-            print(f'Generation {g}:  CONVERGED! Restart calculations...')
+        # Stop if cancelled (e.g., by the user) or out of budget.
+        if token.check(game.stats):
+            game.stats.stop_reason = token.reason
+            break
+
+        # Let the caller inspect and modify the population, or stop the run.
+        if on_generation and on_generation(g, population):
+            break
+
+        # Early convergence (or stagnation) handling - the best individuals
+        # are kept and the rest of the population is replaced.
+        if restart.update(maximum, minimum, value):
+            n_keep = restart.n_keep(pop_size)
             game.stats.restarts += 1
-            game.stats.min_fitness.clear()
-            game.stats.max_fitness.clear()
-            game.stats.avg_fitness.clear()
-            for i in range(pop_size):
-                population[i] = Solution(game)
+            game.stats.restart_generations.append(g)
+            if verbose:
+                print(f'Generation {g}:  STAGNATED! Restart calculations '
+                      f'(keeping the best {n_keep})...')
+            for i in range(n_keep, pop_size):
+                population[i] = new_solution(game)
             continue
 
-        # Bias Selection.
-        bias_array = make_bias_array(population)
-
         # Elitism.
         elites = [sol for sol in population[:n_elite]]
 
         # Cross-over.
+        scores = [s.fitness for s in population]
         newborns = []
-        while len(newborns) < n_newborns:
-            i, j = sample(bias_array, 2)
-            s = cross_over(game, population[i].vector, population[j].vector)
+        for i, j in select(scores, (n_newborns, 2), selection,
+                           rng=game.np_rng):
+            s = cross(game, population[i].vector, population[j].vector)
             newborns.append(s)
 
-        # Replication.
-        survivors = []
-        while len(survivors) < n_survivors:
-            i = choice(bias_array)
-            survivors.append(population[i])
-            bias_array = list(filter(lambda k: k != i, bias_array))
+        # Replication (without repetitions).
+        survivors = [population[i] for i in
+                     select(scores, n_survivors, selection, replace=False,
+                            rng=game.np_rng)]
 
-        # Mutation.
+        # Mutation - a mutant replaces its origin if it is better, or at the
+        # (adaptive) acceptance rate.
         non_elites = survivors + newborns
         mutated = []
         for s in non_elites:
-            m = mutate(game, s.vector)
-            mutated.append(m if m.fitness > s.fitness else s)
+            m = mutation(game, s.vector, s.fitness if delta else None)
+            if m.fitness > s.fitness or \
+                    game.rng.random() < restart.acceptance_rate:
+                mutated.append(m)
+            else:
+                mutated.append(s)
 
         # Create next generation.
         population = elites + mutated
@@ -140,4 +212,5 @@ def genetic_solver(game, generations, pop_size, elitism, crossover, optim=None,
     game.stats.solution = best_solution
     game.stats.fitness = best_fitness
     game.stats.runtime = str(datetime.now() - start).split(".")[0]
+    game.cache = None
     return game.stats
@@ -2,34 +2,159 @@
 # Content: a class of statistics and info about the algorithm and the solutions.
 
 
+import numpy as np
 from prettytable import PrettyTable
-from matplotlib import pyplot as plt
+
+
+# The maximal number of generations that a history keeps.
+HISTORY_SIZE = 10000
+
+
+class History:
+    """
+    An instance of this class records the worst, best and average fitness and
+    the diversity of every generation of a run, in a NumPy array of bounded
+    size that grows as needed. Once it is full, either the oldest records are
+    overwritten (a ring buffer of the recent generations), or every other
+    record is dropped and only every other generation is recorded from then on
+    (downsampling, which keeps the whole run at a lower resolution).
+    """
+
+    COLUMNS = {'generation': 0, 'min': 1, 'max': 2, 'avg': 3, 'diversity': 4}
+
+    def __init__(self, size=HISTORY_SIZE, downsample=False):
+        """
+        Constructor.
+        :param size: the maximal number of records.
+        :param downsample: a boolean that tells if to downsample once the
+               history is full, instead of overwriting the oldest records.
+        """
+        self.size = size
+        self.downsample = downsample
+        self.data = np.empty((min(size, 256), len(History.COLUMNS)))
+        self.start = 0  # The index of the oldest record.
+        self.count = 0  # Number of records.
+        self.stride = 1  # Generations per record.
+        self.seen = 0  # Number of generations.
+
+    def __len__(self):
+        return self.count
+
+    def append(self, generation, minimum, maximum, average, diversity=np.nan):
+        """
+        Records a generation.
+        :param generation: generation number.
+        :param minimum: fitness of the worst solution in the generation.
+        :param maximum: fitness of the best solution in the generation.
+        :param average: average fitness of the generation.
+        :param diversity: the diversity of the generation (see restart.py).
+        :return: None.
+        """
+        self.seen += 1
+        if (self.seen - 1) % self.stride:
+            return
+        capacity = len(self.data)
+        if self.count == capacity:
+            if capacity < self.size:
+                data = np.empty((min(2 * capacity, self.size),
+                                 self.data.shape[1]))
+                data[:capacity] = self.rows()
+                self.data = data
+                self.start = 0
+            elif self.downsample:
+                kept = self.rows()[::2]
+                self.data[:len(kept)] = kept
+                self.start = 0
+                self.count = len(kept)
+                self.stride *= 2
+                if (self.seen - 1) % self.stride:
+                    return
+            else:
+                self.data[self.start] = \
+                    generation, minimum, maximum, average, diversity
+                self.start = (self.start + 1) % capacity
+                return
+        self.data[(self.start + self.count) % len(self.data)] = \
+            generation, minimum, maximum, average, diversity
+        self.count += 1
+
+    def rows(self):
+        """
+        :return: a 2D array of the records, from the oldest to the latest.
+        """
+        if self.start + self.count <= len(self.data):
+            return self.data[self.start:self.start + self.count]
+        return np.roll(self.data, -self.start, axis=0)[:self.count]
+
+    def column(self, name):
+        """
+        :param name: one of COLUMNS.
+        :return: an array of the column's values, from the oldest record to
+                 the latest.
+        """
+        return self.rows()[:, History.COLUMNS[name]]
+
+    def clear(self):
+        """
+        Removes all the records.
+        :return: None.
+        """
+        self.start = 0
+        self.count = 0
+        self.stride = 1
+        self.seen = 0
 
 
 class Statistics:
     """
     An object from this class collects information about the experiment and
-    allows to print it to a table or plot it to a graph.
+    allows to print it to a table or plot it to a graph. Recording does not
+    touch matplotlib - the graph is built only once it is shown.
     """
 
-    def __init__(self):
+    def __init__(self, history_size=HISTORY_SIZE, downsample=False):
         """
         Constructor. Initializes the object's knowledge-base.
+        :param history_size: the maximal number of generations in the history.
+        :param downsample: a boolean that tells how a full history keeps
+               recording (see History).
         """
         self.solution_array = None
         self.solution_matrix = None
         self.correctness = False
         self.fitness = 0
         self.runtime = 0
-        self.max_fitness = []
-        self.avg_fitness = []
-        self.min_fitness = []
+        self.history = History(history_size, downsample)
         self.fitness_calls = 0
         self.mutate_calls = 0
         self.cross_over_calls = 0
         self.restarts = 0
+        self.restart_generations = []
         self.generations = 0
-        self.figure = plt.figure()
+        self.stop_reason = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.forced = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.seed = None
+        self.figure = None  # Built by save_plot().
+
+    @property
+    def min_fitness(self):
+        return self.history.column('min')
+
+    @property
+    def max_fitness(self):
+        return self.history.column('max')
+
+    @property
+    def avg_fitness(self):
+        return self.history.column('avg')
+
+    @property
+    def diversity(self):
+        return self.history.column('diversity')
 
     def print_stats(self):
         """
@@ -53,37 +178,73 @@ class Statistics:
             stats.add_row(['Mutate Calls:', self.mutate_calls])
             stats.add_row(['X-Over Calls:', self.cross_over_calls])
             stats.add_row(['Restarts:', self.restarts])
+            if self.restart_generations:
+                stats.add_row(['Restarted at:', ', '.join(
+                    str(g) for g in self.restart_generations[-10:])])
+            if len(self.history) and not np.isnan(self.diversity[-1]):
+                stats.add_row(['Diversity:', f'{self.diversity[-1]:.2f}'])
+            if self.nodes:
+                stats.add_row(['Search Nodes:', self.nodes])
+                stats.add_row(['Backtracks:', self.backtracks])
+            if self.forced:
+                stats.add_row(['Forced Cells:', self.forced])
+            if self.cache_hits or self.cache_misses:
+                stats.add_row(['Cache Hits:', self.cache_hits])
+                stats.add_row(['Cache Misses:', self.cache_misses])
+            if self.stop_reason:
+                stats.add_row(['Stopped by:', self.stop_reason])
+            if self.seed is not None:
+                stats.add_row(['Seed:', self.seed])
             print(stats, end='\n\n')
         else:
             print('Error: Could not print statistics.')
 
     def save_plot(self):
         """
-        This method allows saving a plot of current situation to a variable
-        attribute for later show.
+        This method builds a plot of the fitness per generation (and marks the
+        restarts) to a figure attribute for later show. matplotlib is imported
+        only here.
         :return: None. But it creates plot figure.
         """
-        plt.clf()
+        from matplotlib import pyplot as plt
+        if self.figure is None:
+            self.figure = plt.figure()
+        self.figure.clf()
+        axes = self.figure.add_subplot()
         title = 'Fitness per generation\n'
-        title += f'Attempt: {self.restarts + 1} | '
+        title += f'Attempts: {self.restarts + 1} | '
         title += f'Fitness calls: {self.fitness_calls} | '
         title += f'Runtime: {self.runtime}'
-        plt.title(title)
-        plt.xlabel('Generation')
-        plt.ylabel('Fitness')
-        x = list(range(len(self.min_fitness)))
-        plt.plot(x, self.min_fitness, label='Minimal fitness')
-        plt.plot(x, self.max_fitness, label='Maximal fitness')
-        plt.plot(x, self.avg_fitness, label='Average fitness')
-        plt.legend()
+        axes.set_title(title)
+        axes.set_xlabel('Generation')
+        axes.set_ylabel('Fitness')
+        x = self.history.column('generation')
+        axes.plot(x, self.min_fitness, label='Minimal fitness')
+        axes.plot(x, self.max_fitness, label='Maximal fitness')
+        axes.plot(x, self.avg_fitness, label='Average fitness')
+        for g in self.restart_generations:
+            axes.axvline(g, color='gray', linestyle=':', linewidth=1)
+        axes.legend()
 
     def show_plot(self):
         """
-        This method shows the saved plot.
+        This method shows the plot (and builds it first, if it was not saved).
         :return: None.
         """
+        if self.figure is None:
+            self.save_plot()
         self.figure.show()
 
+    def close_plot(self):
+        """
+        This method releases the plot's figure, if it was built.
+        :return: None.
+        """
+        if self.figure is not None:
+            from matplotlib import pyplot as plt
+            plt.close(self.figure)
+            self.figure = None
+
     def reset(self):
         """
         This method re-initializes all object's attributes.
@@ -94,11 +255,18 @@ class Statistics:
         self.correctness = False
         self.fitness = 0
         self.runtime = 0
-        self.max_fitness.clear()
-        self.avg_fitness.clear()
-        self.min_fitness.clear()
+        self.history.clear()
         self.fitness_calls = 0
         self.mutate_calls = 0
         self.cross_over_calls = 0
         self.restarts = 0
+        self.restart_generations.clear()
         self.generations = 0
+        self.stop_reason = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.forced = 0
+        self.nodes = 0
+        self.backtracks = 0
+        self.seed = None
+        self.close_plot()
@@ -2,28 +2,32 @@
 # Content: class and functions to support genetic algorithms.
 
 
-from random import randint, shuffle, sample
-
-
 class Solution:
     """
     This class wraps the representation of a solution for the game. A solution
     is represented by a vector of natural numbers, and each solution has a score
     calculated by a fitness function.
     """
-    def __init__(self, game, vector=None):
+    def __init__(self, game, vector=None, score=None):
         """
-        Constructor. Initialize a random vector of natural numbers or a setting
-        the given vector as the Solution's vector. Then calculate the vector's
-        fitness and save it to an attribute.
+        Constructor. Initialize a random vector of natural numbers (from the
+        game's domains, if it has any) or a setting the given vector as the
+        Solution's vector. Then calculate the vector's
+        fitness (unless it is already known) and save it to an attribute.
         :param game: a Futoshiki game object.
         :param vector: a vector of natural numbers repressing a solution.
+        :param score: the fitness of the given vector, if already known.
         """
         if vector:
             self.vector = vector
+        elif game.domains:
+            self.vector = [game.rng.choice(domain) for domain in game.domains]
         else:
-            self.vector = [randint(1, game.dim) for _ in range(game.solution_size)]
-        self.fitness = fitness(game, self.vector)
+            self.vector = [game.rng.randint(1, game.dim)
+                           for _ in range(game.solution_size)]
+        if score is None:
+            score = fitness(game, self.vector)
+        self.fitness = score
 
 
 def gather_info(population):
@@ -45,21 +49,28 @@ def gather_info(population):
     return maximum, minimum, round(total / len(population), 2)
 
 
-def make_bias_array(population):
+def print_generation(g, minimum, average, maximum, best_fitness,
+                     fitness_calls):
     """
-    This function creates a bias array that aid to make a biased selection.
-    :param population: a list of Solution objects.
-    :return: a bias array (as shown in class).
+    This function prints information about the g-th generation.
+    :param g: generation number.
+    :param minimum: fitness of the worst solution in the generation.
+    :param average: average fitness of the generation.
+    :param maximum: fitness of the best solution in the generation.
+    :param best_fitness: fitness of the best solution found so far.
+    :param fitness_calls: number of fitness calls so far.
+    :return: None.
     """
-    bias_array = []
-    for i, s in zip(range(len(population)), population):
-        for j in range(s.fitness):
-            bias_array.append(i)
-    shuffle(bias_array)  # to reduce programmatic biases.
-    return bias_array
+    average_str = f'{average:.2f}'
+    print(f'Generation {g}:  '
+          f'Worst fit: {minimum}  |  '
+          f'Average fit: {average_str}  |  '
+          f'Best fit: {maximum}  |  '
+          f'Optimal fit: {best_fitness}  |  '
+          f'Fitness calls: {fitness_calls}')
 
 
-def mutate(game, solution):
+def mutate(game, solution, parent_fitness=None):
     """
     This function is the implementation of mutation function. It flips a 3-sides
     coin and choose mutation tactics in a uniform distribution. The tactics are
@@ -68,38 +79,51 @@ def mutate(game, solution):
     random number k and assign solution[i]=k.
     :param game: a Futoshiki game object.
     :param solution: a Solution object.
+    :param parent_fitness: the fitness of the given solution. If given, the
+           fitness of the mutant is calculated incrementally from it.
     :return: new mutated solution.
     """
     game.stats.mutate_calls += 1
 
-    # Flip a 3-sided coin...
-    coin = randint(1, 3)
+    # Flip a 3-sided coin... (a single index cannot be swapped, so it is always
+    # changed).
+    coin = game.rng.randint(1, 3) if len(solution) > 1 else 3
 
     # Tactic 1 -- swapping two random indexes.
     if coin == 1:
         indexes = [i for i in range(len(solution))]
-        i, j = sample(indexes, 2)
+        i, j = game.rng.sample(indexes, 2)
         array = solution.copy()
         temp = array[i]
         array[i] = array[j]
         array[j] = temp
+        changed = [i, j]
 
     # Tactic 2 -- swapping two adjacent indexes (randomly).
     elif coin == 2:
-        i = randint(1, len(solution) - 1)
+        i = game.rng.randint(1, len(solution) - 1)
         j = i - 1
         array = solution.copy()
         temp = array[i]
         array[i] = array[j]
         array[j] = temp
+        changed = [i, j]
 
     # Tactic 3 -- changing one number in the vector.
     else:
+        i = game.rng.randint(0, len(solution) - 1)
         array = solution.copy()
-        array[randint(0, len(solution) - 1)] = randint(1, game.dim)
+        if game.domains:
+            array[i] = game.rng.choice(game.domains[i])
+        else:
+            array[i] = game.rng.randint(1, game.dim)
+        changed = [i]
 
     # Create a new solution based on the new array and return it.
-    return Solution(game, array)
+    if parent_fitness is None:
+        return Solution(game, array)
+    score = delta_fitness(game, solution, parent_fitness, array, changed)
+    return Solution(game, array, score)
 
 
 def cross_over(game, solution1, solution2):
@@ -111,7 +135,7 @@ def cross_over(game, solution1, solution2):
     :return: a cross-overed solution - a newborn.
     """
     game.stats.cross_over_calls += 1
-    sep = randint(0, len(solution1) - 1)
+    sep = game.rng.randint(0, len(solution1) - 1)
     array = solution1[:sep] + solution2[sep:]
     return Solution(game, array)
 
@@ -120,26 +144,97 @@ def fitness(game, solution):
     """
     This function is the fitness evaluation score function. By given a solution,
     it calculates the number of constraints is satisfies in the given game's
-    board (matrix).
+    board (see board.py). A score that is found in the game's fitness cache is
+    returned without loading the solution, so callers that read the game's
+    board or matrix afterwards should load the solution themselves (see
+    Futoshiki.set()).
     :param game: a Futoshiki game object.
     :param solution: a Solution object.
     :return: fitness score - the number of satisfied constraints.
     """
+    key = None
+    if game.cache is not None:
+        key = game.cache.key(solution)
+        score = game.cache.get(key, game.stats)
+        if score is not None:
+            return score
     game.stats.fitness_calls += 1
     game.set(solution)
-    score = game.n_constraints
-    for x in range(game.dim):
-        for y in range(game.dim):
-            v = game.matrix[x][y]
-            for i in range(game.dim):
-                if i != x and game.matrix[i][y] == v:
-                    score -= 1  # doesn't satisfies row-constraint.
-                    break
-            for j in range(game.dim):
-                if j != y and game.matrix[x][j] == v:
-                    score -= 1  # doesn't satisfies column-constraint.
-                    break
-    for a, b, c, d in game.relations:
-        if game.matrix[a][b] <= game.matrix[c][d]:
-            score -= 1  # doesn't satisfies relation-constraint.
+    score = game.board.score()
+    if key is not None:
+        game.cache.put(key, score)
+    return score
+
+
+def cell_value(game, solution, i, j):
+    """
+    This function returns the value of the i,j-cell of the game's matrix when
+    the given solution is set, without actually setting it.
+    :param game: a Futoshiki game object.
+    :param solution: a vector of natural numbers.
+    :param i: row of the cell.
+    :param j: column of the cell.
+    :return: the value of the cell.
+    """
+    k = game.index.get((i, j))
+    return game.given[(i, j)] if k is None else solution[k]
+
+
+def line_penalty(values):
+    """
+    This function counts the cells in a row or a column whose value appears
+    in another cell of that line, i.e., the line's unsatisfied constraints.
+    :param values: a list of the values of the line's cells.
+    :return: the number of unsatisfied cells.
+    """
+    counts = {}
+    for v in values:
+        counts[v] = counts.get(v, 0) + 1
+    return sum(k for k in counts.values() if k > 1)
+
+
+def delta_fitness(game, parent, parent_fitness, solution, changed,
+                  rows=True):
+    """
+    This function calculates the fitness of a solution that differs from a
+    parent solution only in a few indexes, by re-checking only the columns,
+    rows and relations that touch the changed cells. It does not use the
+    game's board, so it gives the same result as fitness(game, solution) in
+    O(n) per changed cell, whatever was loaded to the board before (which it
+    leaves as it is).
+    :param game: a Futoshiki game object.
+    :param parent: the parent vector.
+    :param parent_fitness: the fitness of the parent vector.
+    :param solution: the new vector.
+    :param changed: a list of indexes in which the vectors may differ.
+    :param rows: a boolean that tells if to re-check the rows. Encodings that
+           keep every row a permutation (see permutation.py) pass False, so
+           only the columns and relations are checked.
+    :return: fitness score - the number of satisfied constraints.
+    """
+    cells = {game.cells[k] for k in changed if parent[k] != solution[k]}
+    if not cells:
+        return parent_fitness  # Nothing changed - no evaluation is needed.
+    key = None
+    if game.cache is not None:
+        key = game.cache.key(solution)
+        score = game.cache.get(key, game.stats)
+        if score is not None:
+            return score
+    game.stats.fitness_calls += 1
+    score = parent_fitness
+    lines = [(game.col_given, game.col_index, {j for _, j in cells})]
+    if rows:
+        lines.append((game.row_given, game.row_index, {i for i, _ in cells}))
+    for given, index, touched in lines:
+        for x in touched:
+            score += line_penalty(given[x] + [parent[k] for k in index[x]])
+            score -= line_penalty(given[x] + [solution[k] for k in index[x]])
+    for a, b, c, d in {r for cell in cells for r in game.incident[cell]}:
+        for vector, sign in (parent, 1), (solution, -1):
+            u = cell_value(game, vector, a, b)
+            if u <= cell_value(game, vector, c, d):
+                score += sign  # a relation-constraint is (un)satisfied.
+    if key is not None:
+        game.cache.put(key, score)
     return score
@@ -0,0 +1,27 @@
+# File: test_batch.py
+# Content: checks that the batched fitness agrees with the scalar fitness.
+
+
+from os.path import dirname, join
+import numpy as np
+import pytest
+from src.game import parse_game
+from src.stats import Statistics
+from src.batch import BatchEvaluator
+from src.utils import fitness
+
+
+INPUTS = join(dirname(dirname(__file__)), 'inputs')
+
+
+@pytest.mark.parametrize('name', ['5_easy.txt', '6_tricky.txt',
+                                  '7_tricky.txt'])
+def test_batch_fitness_matches_fitness(name):
+    with open(join(INPUTS, name), 'r') as file:
+        game = parse_game(file.readlines())
+    game.stats = Statistics()
+    rng = np.random.default_rng(0)
+    genes = rng.integers(1, game.dim + 1, (200, game.solution_size),
+                         dtype=np.int8)
+    scores = BatchEvaluator(game)(genes)
+    assert scores.tolist() == [fitness(game, g.tolist()) for g in genes]
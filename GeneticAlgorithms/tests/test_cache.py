@@ -0,0 +1,30 @@
+# File: test_cache.py
+# Content: checks that the fitness cache stays bounded and correct.
+
+
+from os.path import dirname, join
+from src.game import parse_game
+from src.solver import genetic_solver
+from src.utils import fitness
+
+
+INPUTS = join(dirname(dirname(__file__)), 'inputs')
+
+
+def test_cache_is_bounded_and_correct():
+    with open(join(INPUTS, '7_tricky.txt'), 'r') as file:
+        game = parse_game(file.readlines())
+    sizes = []
+
+    def check(g, population):
+        cache, game.cache = game.cache, None  # Score without the cache.
+        sizes.append(len(cache.scores))
+        assert len(cache.scores) <= cache.max_size
+        for key, score in cache.scores.items():
+            assert score == fitness(game, list(key))
+        game.cache = cache
+
+    stats = genetic_solver(game, 50, 100, 0.01, 0.8, cache_size=64,
+                           verbose=False, on_generation=check, seed=1)
+    assert max(sizes) == 64
+    assert stats.cache_hits > 0
@@ -0,0 +1,26 @@
+# File: test_exact.py
+# Content: checks that the exact solver finds the bundled games' solutions.
+
+
+from glob import glob
+from os.path import basename, dirname, join
+import pytest
+from src.game import parse_game
+from src.exact import exact_solver
+
+
+INPUTS = join(dirname(dirname(__file__)), 'inputs')
+SOLVED = sorted(basename(path)[:-len('_sol.txt')] + '.txt'
+                for path in glob(join(INPUTS, '*_sol.txt')))
+
+
+@pytest.mark.parametrize('name', SOLVED)
+def test_exact_solver_matches_solution_file(name):
+    with open(join(INPUTS, name), 'r') as file:
+        game = parse_game(file.readlines())
+    with open(join(INPUTS, name[:-len('.txt')] + '_sol.txt'), 'r') as file:
+        square = [[int(v) for v in line.split()]
+                  for line in file if line.strip()]
+    stats = exact_solver(game, verbose=False)
+    assert stats.fitness == game.n_constraints
+    assert stats.solution == [square[i][j] for i, j in game.cells]
@@ -0,0 +1,43 @@
+# File: test_fitness.py
+# Content: checks that the incremental fitness agrees with the full fitness.
+
+
+from os.path import dirname, join
+from random import Random
+import pytest
+from src.game import parse_game
+from src.stats import Statistics
+from src.utils import Solution, mutate, fitness
+from src import permutation
+
+
+INPUTS = join(dirname(dirname(__file__)), 'inputs')
+
+
+def load(name, seed=0):
+    with open(join(INPUTS, name), 'r') as file:
+        game = parse_game(file.readlines())
+    game.stats = Statistics()
+    game.rng = Random(seed)
+    return game
+
+
+@pytest.mark.parametrize('name', ['5_tricky.txt', '7_tricky.txt'])
+def test_delta_fitness_matches_fitness(name):
+    game = load(name)
+    population = [Solution(game) for _ in range(20)]
+    for _ in range(2000):
+        parent = game.rng.choice(population)
+        mutant = mutate(game, parent.vector, parent.fitness)
+        assert mutant.fitness == fitness(game, mutant.vector)
+        population[game.rng.randrange(len(population))] = mutant
+
+
+def test_permutation_delta_fitness_matches_fitness():
+    game = load('7_tricky.txt')
+    population = [permutation.random_solution(game) for _ in range(20)]
+    for _ in range(2000):
+        parent = game.rng.choice(population)
+        mutant = permutation.mutate(game, parent.vector, parent.fitness)
+        assert mutant.fitness == fitness(game, mutant.vector)
+        population[game.rng.randrange(len(population))] = mutant
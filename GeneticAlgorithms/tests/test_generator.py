@@ -0,0 +1,20 @@
+# File: test_generator.py
+# Content: checks that the generated games have exactly one solution.
+
+
+import pytest
+from src.game import parse_game
+from src.exact import count_solutions
+from src.generator import generate_corpus
+
+
+@pytest.mark.parametrize('dim', [4, 5, 6])
+def test_generated_games_have_unique_solutions(tmp_path, dim):
+    for path in generate_corpus(str(tmp_path), 5, dim, 0.1, 0.3, seed=1):
+        with open(path, 'r') as file:
+            game = parse_game(file.readlines())
+        with open(path[:-len('.txt')] + '_sol.txt', 'r') as file:
+            square = [[int(v) for v in line.split()] for line in file]
+        count, solutions = count_solutions(game, 2)
+        assert count == 1
+        assert solutions[0] == square
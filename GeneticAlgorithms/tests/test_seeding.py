@@ -0,0 +1,33 @@
+# File: test_seeding.py
+# Content: checks that runs with the same seed are identical.
+
+
+from os.path import dirname, join
+import pytest
+from src.game import parse_game
+from src.solver import genetic_solver
+from src.batch import batch_genetic_solver
+
+
+INPUTS = join(dirname(dirname(__file__)), 'inputs')
+
+
+def run(solver, seed, **params):
+    with open(join(INPUTS, '7_tricky.txt'), 'r') as file:
+        game = parse_game(file.readlines())
+    stats = solver(game, 100, 50, 0.02, 0.8, verbose=False, seed=seed,
+                   **params)
+    return (stats.seed, stats.solution, stats.fitness, stats.fitness_calls,
+            stats.mutate_calls, stats.cross_over_calls, stats.restarts,
+            stats.generations, stats.history.rows().tolist())
+
+
+@pytest.mark.parametrize('solver, params', [
+    (genetic_solver, {}),
+    (genetic_solver, {'optim': 'lamark', 'cache_size': 100}),
+    (batch_genetic_solver, {'optim': 'darwin'}),
+])
+def test_same_seed_gives_same_statistics(solver, params):
+    first = run(solver, 7, **params)
+    assert run(solver, 7, **params) == first
+    assert run(solver, 8, **params) != first